@@ -1,113 +1,182 @@
 import asyncio
-import random
+from typing import Dict
 
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 
 from enums import InvestigationResult, EscalationResult, FixResult
-from models import Ticket
+from models import Ticket, TicketRef
+from notifications import get_notification_batcher
+from agent_pool import get_agent_pool
+from knowledge_base import get_knowledge_base
+from activity_latency import get_latency_recorder
+from profiles import active_profile
+from ticket_store import get_ticket_store
+
+# Long activities report progress this often; keep it well under the heartbeat timeout in base_workflow.HEARTBEAT_TIMEOUT
+HEARTBEAT_INTERVAL = 2.0
+
+
+async def load_ticket(ref: TicketRef) -> Ticket:
+    """The full ticket behind a reference, from this process's cache or the shared store"""
+    store = get_ticket_store()
+    ticket = store.get_cached(ref.ticket_id)
+    if ticket is None:
+        ticket = await asyncio.get_running_loop().run_in_executor(None, store.get, ref.ticket_id)
+    if ticket is None:
+        raise ApplicationError(f"Ticket {ref.ticket_id} not found in the ticket store", non_retryable=True)
+    return ticket
+
+async def simulate_with_heartbeats(activity_name: str):
+    """Simulated work that heartbeats its progress, and on a retry resumes from the last progress the server recorded"""
+    details = activity.info().heartbeat_details
+    if details:
+        elapsed, total = details[0]["elapsed"], details[0]["total"]
+        activity.logger.info(f"Resuming {activity_name} at {elapsed:.1f}s of {total:.1f}s "
+                             f"(attempt {activity.info().attempt})")
+    else:
+        elapsed, total = 0.0, active_profile().delay(activity_name)
+    while elapsed < total:
+        step = min(HEARTBEAT_INTERVAL, total - elapsed)
+        await asyncio.sleep(step)
+        elapsed += step
+        activity.heartbeat({"elapsed": elapsed, "total": total})
 
 @activity.defn
-async def send_auto_response(ticket: Ticket) -> str:
+async def suggest_timeouts(headroom: float, floor: float) -> Dict[str, float]:
+    """Start-to-close timeouts in seconds per activity type: recorded p99 latency times headroom, at least floor"""
+    recorder = get_latency_recorder()
+    if recorder is None:
+        # This worker doesn't record latencies (no --latency-db), so every activity keeps its static timeout
+        return {}
+    p99 = await asyncio.get_running_loop().run_in_executor(None, recorder.p99)
+    return {activity_type: round(max(floor, latency * headroom), 3) for activity_type, latency in p99.items()}
+
+@activity.defn
+async def store_ticket(ticket: Ticket) -> TicketRef:
+    """Save the full ticket so later activities only need its ID"""
+    activity.logger.debug(f"Storing ticket {ticket.ticket_id}")
+    await asyncio.get_running_loop().run_in_executor(None, get_ticket_store().put, ticket)
+    return ticket.ref()
+
+@activity.defn
+async def send_auto_response(ticket: TicketRef) -> str:
     """Send automated acknowledgment"""
-    activity.logger.debug(f"Sending auto-response to {ticket.customer_name} for ticket {ticket.ticket_id}")
-    await asyncio.sleep(7)
-    return f"Auto-response sent to {ticket.customer_name}"
+    customer_name = (await load_ticket(ticket)).customer_name
+    activity.logger.debug(f"Sending auto-response to {customer_name} for ticket {ticket.ticket_id}")
+    await active_profile().simulate("send_auto_response")
+    return f"Auto-response sent to {customer_name}"
 
 @activity.defn
-async def search_knowledge_base(ticket: Ticket) -> str:
+async def search_knowledge_base(ticket: TicketRef) -> str:
     """Search knowledge base for solution"""
-    activity.logger.debug(f"Searching knowledge base for: {ticket.issue}")
-    await asyncio.sleep(7)
-
-    # Sometimes no solution found
-    if random.random() < 0.3:
+    issue = (await load_ticket(ticket)).issue
+    activity.logger.debug(f"Searching knowledge base for: {issue}")
+    await active_profile().simulate("search_knowledge_base")
+
+    knowledge_base = get_knowledge_base()
+    if knowledge_base.is_stale():
+        # The directory scan and file reads block, so they run on a thread; the index itself is updated on the loop
+        changes = await asyncio.get_running_loop().run_in_executor(None, knowledge_base.read_changes)
+        knowledge_base.apply_changes(changes)
+    matches = knowledge_base.search(issue)
+    if not matches:
         raise ApplicationError("No solution found in knowledge base", non_retryable=True)
 
-    return "Solution found: Here's a link: [link]"
+    links = ", ".join(f"kb/{article_id}" for article_id, _ in matches)
+    return f"Solution found: Here's a link: {links}"
 
 @activity.defn
-async def assign_agent(ticket: Ticket):
+async def assign_agent(ticket: TicketRef):
     """Assign ticket to agent"""
     agent_type = "senior" if ticket.priority == "high" else "regular"
     activity.logger.debug(f"Assigning {agent_type} agent to ticket {ticket.ticket_id}")
-    await asyncio.sleep(7)
-    agent_name = "Agent-" + str(random.randint(100, 999))
+    await active_profile().simulate("assign_agent")
+    # SQLite calls block, so keep them off the event loop
+    agent_name = await asyncio.get_running_loop().run_in_executor(
+        None, get_agent_pool().reserve, ticket.ticket_id, agent_type)
+    if agent_name is None:
+        raise ApplicationError(f"No {agent_type} agents available", type=InvestigationResult.AGENT_UNAVAILABLE.value)
     return agent_name
 
 @activity.defn
-async def agent_investigate(ticket: Ticket) -> str:
+async def agent_investigate(ticket: TicketRef) -> str:
     """Agent investigates the issue"""
-    activity.logger.debug(f"Agent investigating ticket {ticket.ticket_id}: {ticket.issue}")
-    await asyncio.sleep(7)
+    activity.logger.debug(f"Agent investigating ticket {ticket.ticket_id}")
+    await simulate_with_heartbeats("agent_investigate")
 
     # Sometimes needs escalation
-    if random.random() < 0.3:
+    if active_profile().fails("agent_investigate"):
         return InvestigationResult.NEEDS_ESCALATION.value
 
     return InvestigationResult.COMPLETE.value
 
 @activity.defn
-async def agent_resolve(ticket: Ticket) -> str:
+async def agent_resolve(ticket: TicketRef) -> str:
     """Agent resolves the ticket"""
     activity.logger.debug(f"Agent resolving ticket {ticket.ticket_id}")
-    await asyncio.sleep(7)
-    if random.random() < 0.2:
+    await simulate_with_heartbeats("agent_resolve")
+    if active_profile().fails("agent_resolve"):
         return InvestigationResult.NEEDS_ESCALATION.value
 
     return InvestigationResult.COMPLETE.value
 
 @activity.defn
-async def escalate_to_engineering(ticket: Ticket) -> str:
+async def escalate_to_engineering(ticket: TicketRef) -> str:
     """Escalate to engineering team"""
-    activity.logger.debug(f"Escalating ticket {ticket.ticket_id} to engineering: {ticket.issue}")
-    await asyncio.sleep(30)
+    activity.logger.debug(f"Escalating ticket {ticket.ticket_id} to engineering")
+    await simulate_with_heartbeats("escalate_to_engineering")
     # Sometimes the engineering team punts to the backlog
-    if random.random() < 0.2:
+    if active_profile().fails("escalate_to_engineering"):
         return EscalationResult.REJECTED.value
 
     return EscalationResult.ACCEPTED.value
 
 @activity.defn
-async def apply_urgent_fix(ticket: Ticket) -> str:
+async def apply_urgent_fix(ticket: TicketRef) -> str:
     """Apply urgent fix for high priority issues"""
     activity.logger.debug(f"Applying urgent fix for ticket {ticket.ticket_id}")
-    await asyncio.sleep(7)
+    await simulate_with_heartbeats("apply_urgent_fix")
 
     # Sometimes fix fails
-    if random.random() < 0.1:
+    if active_profile().fails("apply_urgent_fix"):
         return FixResult.FAILED.value
 
     return FixResult.SUCCESS.value
 
 @activity.defn
-async def notify_customer(ticket: Ticket, message: str) -> None:
+async def notify_customer(ticket: TicketRef, message: str) -> str:
     """Notify customer of resolution"""
-    activity.logger.debug(f"Notifying {ticket.customer_name}: {message}")
-    await asyncio.sleep(3)
+    customer_name = (await load_ticket(ticket)).customer_name
+    activity.logger.debug(f"Notifying {customer_name}: {message}")
+    return await get_notification_batcher().send(
+        "notify_customer", customer_name, f"[{ticket.ticket_id}] {message}")
 
 @activity.defn
-async def notify_management(ticket: Ticket):
+async def notify_management(ticket: TicketRef) -> str:
     """Notify management for high priority tickets"""
     activity.logger.debug(f"Notifying management about {ticket.priority} priority ticket {ticket.ticket_id}")
-    await asyncio.sleep(4)
+    # One recipient, so an incident's worth of escalations collapses into a handful of digests
+    return await get_notification_batcher().send(
+        "notify_management", "management", f"{ticket.priority} priority ticket {ticket.ticket_id} needs attention")
 
 
 @activity.defn
-async def validate_resolution(ticket: Ticket) -> str:
+async def validate_resolution(ticket: TicketRef) -> str:
     """Validate that resolution actually worked"""
     activity.logger.debug(f"Validating resolution for {ticket.ticket_id}")
-    await asyncio.sleep(5)
+    await active_profile().simulate("validate_resolution")
 
     # Sometimes validation fails
-    if random.random() < 0.3:
+    if active_profile().fails("validate_resolution"):
         raise ApplicationError("Customer reported solution didn't work", non_retryable=True)
 
     return "Resolution validated"
 
 @activity.defn
-async def release_agent(agent_name: str, ticket: Ticket) -> str:
+async def release_agent(agent_name: str, ticket: TicketRef) -> str:
     """Release agent from ticket assignment"""
-    activity.logger.info(f"COMPENSATION: Releasing agent {agent_name} from ticket {ticket.ticket_id}")
-    await asyncio.sleep(3)
+    activity.logger.info(f"Releasing agent {agent_name} from ticket {ticket.ticket_id}")
+    await active_profile().simulate("release_agent")
+    await asyncio.get_running_loop().run_in_executor(None, get_agent_pool().release, ticket.ticket_id, agent_name)
     return f"Agent {agent_name} released"
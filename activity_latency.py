@@ -0,0 +1,113 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+from temporalio import activity
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+from results import percentile
+
+DEFAULT_LATENCY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "activity_latency.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity_latency (
+    process TEXT NOT NULL,
+    activity_type TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    p50 REAL NOT NULL,
+    p99 REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (process, activity_type)
+);
+"""
+
+
+class LatencyRecorder:
+    """Recent successful activity durations in this process, published as percentiles to a SQLite file.
+
+    Every worker process on the host publishes its own rows; readers take the worst p99 across processes that have
+    published recently, so one slow process is enough to keep timeouts loose.
+    """
+    def __init__(self, path: str = DEFAULT_LATENCY_DB, window: int = 1000, publish_interval: float = 10.0,
+                 stale_after: float = 300.0):
+        self.path = path
+        self.publish_interval = publish_interval
+        self.stale_after = stale_after
+        self._process = f"{socket.gethostname()}:{os.getpid()}"
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._last_publish = time.monotonic()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def record(self, activity_type: str, seconds: float):
+        self._samples[activity_type].append(seconds)
+
+    def claim_publish(self) -> bool:
+        """True at most once per publish interval; call from the event loop"""
+        now = time.monotonic()
+        if now - self._last_publish < self.publish_interval:
+            return False
+        self._last_publish = now
+        return True
+
+    def publish(self):
+        rows = []
+        for activity_type, samples in list(self._samples.items()):
+            values = sorted(samples)
+            rows.append((self._process, activity_type, len(values), percentile(values, 50), percentile(values, 99),
+                         time.time()))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO activity_latency VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def p99(self, min_samples: int = 50) -> Dict[str, float]:
+        """Worst recent p99 per activity type, for activity types with enough samples to trust"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT activity_type, MAX(p99) FROM activity_latency WHERE samples >= ? AND updated_at >= ? "
+                "GROUP BY activity_type", (min_samples, time.time() - self.stale_after))
+            return dict(rows.fetchall())
+
+
+class LatencyInterceptor(Interceptor):
+    """Times every activity the worker runs, local activities included"""
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _LatencyActivityInbound(next)
+
+
+class _LatencyActivityInbound(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput):
+        recorder = get_latency_recorder()
+        if recorder is None:
+            return await super().execute_activity(input)
+        started = time.monotonic()
+        result = await super().execute_activity(input)
+        # Only successes: a timed-out or failed attempt says nothing about how long the work takes
+        recorder.record(activity.info().activity_type, time.monotonic() - started)
+        if recorder.claim_publish():
+            await asyncio.get_running_loop().run_in_executor(None, recorder.publish)
+        return result
+
+
+_recorder: Optional[LatencyRecorder] = None
+_db_path: Optional[str] = None
+
+
+def configure_latency_recorder(path: Optional[str]):
+    """Record latencies into `path`; None (the default) turns recording off"""
+    global _recorder, _db_path
+    _db_path = path
+    _recorder = None
+
+
+def get_latency_recorder() -> Optional[LatencyRecorder]:
+    global _recorder
+    if _recorder is None and _db_path:
+        _recorder = LatencyRecorder(_db_path)
+    return _recorder
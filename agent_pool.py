@@ -0,0 +1,205 @@
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_pool.db")
+
+# (kind, count, capacity per agent) seeded into an empty database
+DEFAULT_ROSTER = [
+    ("regular", 20, 3),
+    ("senior", 5, 2),
+]
+
+# Longer than any ticket legitimately holds an agent (investigation, escalation, and their retries); an assignment
+# older than this belongs to a workflow that was terminated or timed out before it could release
+DEFAULT_ASSIGNMENT_TTL = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    capacity INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    ticket_id TEXT NOT NULL,
+    agent_name TEXT NOT NULL REFERENCES agents(name),
+    assigned_at REAL NOT NULL,
+    PRIMARY KEY (ticket_id, agent_name)
+);
+"""
+
+
+class AgentPool:
+    """Agents with per-agent capacity, shared between worker processes through a SQLite file.
+
+    Each process keeps a min-heap of (utilization, active, name) per agent kind so picking the least-loaded agent
+    is O(log n). The heap is only a hint: every reservation re-checks the agent's row inside an exclusive
+    transaction, and entries that another process has changed are corrected and pushed back.
+    """
+    def __init__(self, path: str = DEFAULT_DB_PATH, roster=DEFAULT_ROSTER, resync_interval: float = 30.0,
+                 assignment_ttl: float = DEFAULT_ASSIGNMENT_TTL):
+        self.path = path
+        self.resync_interval = resync_interval
+        self.assignment_ttl = assignment_ttl
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._heaps: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._known: Dict[str, Tuple[int, int]] = {}   # name -> (active, capacity) as this process last saw it
+        self._last_sync = 0.0
+        with self._transaction():
+            if not self._conn.execute("SELECT 1 FROM agents LIMIT 1").fetchone():
+                self._seed(roster)
+        self._sync()
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+    def _seed(self, roster):
+        number = 100
+        for kind, count, capacity in roster:
+            for _ in range(count):
+                number += 1
+                self._conn.execute("INSERT INTO agents (name, kind, capacity) VALUES (?, ?, ?)",
+                                   (f"Agent-{number}", kind, capacity))
+
+    def _sync(self):
+        """Rebuild the heaps from the database"""
+        self._heaps = {}
+        self._known = {}
+        for name, kind, capacity, active in self._conn.execute("SELECT name, kind, capacity, active FROM agents"):
+            self._known[name] = (active, capacity)
+            self._heaps.setdefault(kind, []).append((active / capacity, active, name))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._last_sync = time.monotonic()
+
+    def _push(self, kind: str, name: str, active: int, capacity: int):
+        self._known[name] = (active, capacity)
+        heapq.heappush(self._heaps[kind], (active / capacity, active, name))
+
+    def _pick(self, kind: str) -> Optional[str]:
+        heap = self._heaps.get(kind, [])
+        while heap:
+            utilization, active, name = heap[0]
+            if self._known.get(name, (None,))[0] != active:
+                heapq.heappop(heap)        # superseded by a newer entry for the same agent
+                continue
+            if utilization >= 1:
+                return None
+            row = self._conn.execute("SELECT active, capacity FROM agents WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                heapq.heappop(heap)
+                self._known.pop(name, None)
+                continue
+            if row[0] != active or row[1] != self._known[name][1]:
+                # Another process reserved or released this agent since we last looked
+                heapq.heappop(heap)
+                self._push(kind, name, row[0], row[1])
+                continue
+            return name
+        return None
+
+    def reserve(self, ticket_id: str, kind: str) -> Optional[str]:
+        """Reserve the least-loaded agent of `kind` for a ticket, or None if every agent is at capacity.
+
+        Idempotent per ticket: a retried reservation returns the agent already holding the ticket.
+        """
+        with self._lock, self._transaction():
+            existing = self._conn.execute(
+                "SELECT a.name FROM assignments s JOIN agents a ON a.name = s.agent_name "
+                "WHERE s.ticket_id = ? AND a.kind = ?", (ticket_id, kind)).fetchone()
+            if existing:
+                return existing[0]
+
+            if time.monotonic() - self._last_sync > self.resync_interval:
+                self._sync()
+            name = self._pick(kind)
+            if name is None:
+                # Our view may be stale -- other processes could have released agents, or workflows that will never
+                # release theirs could be holding the capacity
+                self._reap(time.time() - self.assignment_ttl)
+                self._sync()
+                name = self._pick(kind)
+                if name is None:
+                    return None
+
+            active, capacity = self._known[name]
+            self._conn.execute("UPDATE agents SET active = active + 1 WHERE name = ?", (name,))
+            self._conn.execute("INSERT INTO assignments (ticket_id, agent_name, assigned_at) VALUES (?, ?, ?)",
+                               (ticket_id, name, time.time()))
+            heapq.heappop(self._heaps[kind])
+            self._push(kind, name, active + 1, capacity)
+            return name
+
+    def release(self, ticket_id: str, agent_name: str) -> bool:
+        """Free an agent's slot for a ticket. Returns False if that assignment was already released."""
+        with self._lock, self._transaction():
+            deleted = self._conn.execute("DELETE FROM assignments WHERE ticket_id = ? AND agent_name = ?",
+                                         (ticket_id, agent_name)).rowcount
+            if not deleted:
+                return False
+            self._conn.execute("UPDATE agents SET active = active - 1 WHERE name = ? AND active > 0", (agent_name,))
+            row = self._conn.execute("SELECT kind, active, capacity FROM agents WHERE name = ?", (agent_name,)).fetchone()
+            if row:
+                self._push(row[0], agent_name, row[1], row[2])
+            return True
+
+    def reap(self, max_age: Optional[float] = None) -> int:
+        """Release assignments older than `max_age` seconds (default: the pool's assignment TTL); returns how many"""
+        with self._lock, self._transaction():
+            reaped = self._reap(time.time() - (self.assignment_ttl if max_age is None else max_age))
+            self._sync()
+            return reaped
+
+    def _reap(self, cutoff: float) -> int:
+        """Inside a transaction: drop assignments made before `cutoff` and give their agents the slots back"""
+        stale = self._conn.execute("SELECT ticket_id, agent_name FROM assignments WHERE assigned_at < ?",
+                                   (cutoff,)).fetchall()
+        for ticket_id, agent_name in stale:
+            self._conn.execute("DELETE FROM assignments WHERE ticket_id = ? AND agent_name = ?", (ticket_id, agent_name))
+            self._conn.execute("UPDATE agents SET active = active - 1 WHERE name = ? AND active > 0", (agent_name,))
+            logging.warning(f"Reaped agent {agent_name} from ticket {ticket_id}: held past the assignment TTL")
+        return len(stale)
+
+    def utilization(self) -> Dict[str, Tuple[int, int]]:
+        """(active, capacity) totals per agent kind"""
+        rows = self._conn.execute("SELECT kind, SUM(active), SUM(capacity) FROM agents GROUP BY kind")
+        return {kind: (active, capacity) for kind, active, capacity in rows}
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE takes SQLite's write lock up front, so reserve/release are atomic across processes"""
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_agent_pool: Optional[AgentPool] = None
+_db_path = DEFAULT_DB_PATH
+_assignment_ttl = DEFAULT_ASSIGNMENT_TTL
+
+
+def configure_agent_pool(path: str, assignment_ttl: float = DEFAULT_ASSIGNMENT_TTL):
+    global _agent_pool, _db_path, _assignment_ttl
+    _db_path = path
+    _assignment_ttl = assignment_ttl
+    _agent_pool = None
+
+
+def get_agent_pool() -> AgentPool:
+    global _agent_pool
+    if _agent_pool is None:
+        _agent_pool = AgentPool(_db_path, assignment_ttl=_assignment_ttl)
+    return _agent_pool
@@ -1,9 +1,17 @@
+import abc
+import asyncio
+from dataclasses import dataclass, field, replace
 from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional, Sequence
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError, ApplicationError
 
 with workflow.unsafe.imports_passed_through():
+    from enums import InvestigationResult
+    from models import WorkflowOptions
+    from search_attributes import ASSIGNED_AGENT, ESCALATION_COUNT, TICKET_PRIORITY, TICKET_STATUS, TICKET_STATUSES
     from activities import (
         agent_resolve,
         assign_agent,
@@ -15,33 +23,211 @@ with workflow.unsafe.imports_passed_through():
         send_auto_response,
         search_knowledge_base,
         validate_resolution,
-        release_agent
+        release_agent,
+        store_ticket,
+        suggest_timeouts,
 )
 
+DEFAULT_RETRY_POLICY = RetryPolicy(
+    maximum_attempts=3,
+    initial_interval=timedelta(seconds=1),
+    maximum_interval=timedelta(seconds=10),
+    backoff_coefficient=2.0,
+)
+
+# Bugs, not bad luck -- another attempt would fail the same way
+NON_RETRYABLE_ERROR_TYPES = ["TypeError", "ValueError", "KeyError", "AttributeError"]
+
+def retry_policy(initial: float = 1.0, maximum: float = 10.0, attempts: int = 3, non_retryable: Sequence[str] = ()) -> RetryPolicy:
+    return RetryPolicy(
+        maximum_attempts=attempts,
+        initial_interval=timedelta(seconds=initial),
+        maximum_interval=timedelta(seconds=maximum),
+        backoff_coefficient=2.0,
+        non_retryable_error_types=NON_RETRYABLE_ERROR_TYPES + list(non_retryable),
+    )
+
+@dataclass(frozen=True)
+class ExecutionPolicy:
+    local: bool = False
+    start_to_close_timeout: timedelta = timedelta(minutes=5)
+    retry_policy: RetryPolicy = field(default_factory=lambda: DEFAULT_RETRY_POLICY)
+    heartbeat_timeout: Optional[timedelta] = None
+
+# Fast steps get retried quickly: a stuck attempt times out in seconds instead of holding the ticket for minutes
+FAST_RETRY = retry_policy(initial=0.5, maximum=5)
+
+# Short, cheap steps run as local activities in the workflow worker: no task queue round-trip, and one marker
+# event in history instead of scheduled/started/completed
+LOCAL_ACTIVITY_POLICY = ExecutionPolicy(
+    local=True,
+    start_to_close_timeout=timedelta(seconds=30),
+    retry_policy=FAST_RETRY,
+)
+
+# Long steps heartbeat every couple of seconds (activities.HEARTBEAT_INTERVAL), so a worker that dies mid-step is noticed
+# in seconds rather than at the start-to-close timeout, and the retry resumes from the last progress report
+HEARTBEAT_TIMEOUT = timedelta(seconds=10)
+
+# Timeouts leave room for the slow tail of the production-like profile; --adaptive-timeouts tightens them further
+ACTIVITY_POLICIES = {
+    store_ticket: replace(LOCAL_ACTIVITY_POLICY, start_to_close_timeout=timedelta(seconds=10)),
+    suggest_timeouts: replace(LOCAL_ACTIVITY_POLICY, start_to_close_timeout=timedelta(seconds=10)),
+    send_auto_response: LOCAL_ACTIVITY_POLICY,
+    notify_customer: LOCAL_ACTIVITY_POLICY,
+    release_agent: LOCAL_ACTIVITY_POLICY,
+    search_knowledge_base: ExecutionPolicy(start_to_close_timeout=timedelta(seconds=10), retry_policy=FAST_RETRY),
+    notify_management: ExecutionPolicy(start_to_close_timeout=timedelta(seconds=30), retry_policy=FAST_RETRY),
+    validate_resolution: ExecutionPolicy(start_to_close_timeout=timedelta(seconds=30), retry_policy=FAST_RETRY),
+    # Agents free up within seconds, so an exhausted pool is worth a slower retry or two before giving up
+    assign_agent: ExecutionPolicy(start_to_close_timeout=timedelta(seconds=30),
+                                  retry_policy=retry_policy(initial=2, maximum=10)),
+    agent_investigate: ExecutionPolicy(start_to_close_timeout=timedelta(minutes=2), heartbeat_timeout=HEARTBEAT_TIMEOUT),
+    agent_resolve: ExecutionPolicy(start_to_close_timeout=timedelta(minutes=2), heartbeat_timeout=HEARTBEAT_TIMEOUT),
+    apply_urgent_fix: ExecutionPolicy(start_to_close_timeout=timedelta(minutes=2), heartbeat_timeout=HEARTBEAT_TIMEOUT),
+    escalate_to_engineering: ExecutionPolicy(start_to_close_timeout=timedelta(minutes=5),
+                                             heartbeat_timeout=HEARTBEAT_TIMEOUT),
+}
+
+# Adaptive timeouts: p99 of what the workers have recorded times this headroom, never below the floor and never above
+# the activity's own start-to-close timeout
+ADAPTIVE_HEADROOM = 3.0
+ADAPTIVE_FLOOR = timedelta(seconds=1)
+
+def local_activities() -> list:
+    """Activities the workflow worker has to register because they may run locally"""
+    return [fn for fn, policy in ACTIVITY_POLICIES.items() if policy.local]
+
 class WorkflowBase:
-    @staticmethod
-    async def _execute_activity(activity_call, *args, **kwargs):
+    _options = WorkflowOptions()
+    _status_value = "new"
+    _escalation_count = 0
+    # The agent this ticket currently holds in the pool, until a release has gone through
+    _held_agent: Optional[str] = None
+
+    @property
+    def _status(self) -> str:
+        return self._status_value
+
+    @_status.setter
+    def _status(self, status: str):
+        # Every lifecycle transition also lands in the TicketStatus search attribute; anything off the list stays out
+        # of it, so the board's buckets are lifecycle states
+        self._status_value = status
+        if status in TICKET_STATUSES:
+            self._upsert_ticket_state(status=status)
+
+    def _upsert_ticket_state(self, status: Optional[str] = None, priority: Optional[str] = None,
+                             agent: Optional[str] = None, escalations: Optional[int] = None):
+        """Mirror ticket state into search attributes when WorkflowOptions.search_attributes is on; unchanged values
+        are skipped, since each upsert is a command and an event in history"""
+        if not self._options.search_attributes:
+            return
+        published = self.__dict__.setdefault("_published_state", {})
+        updates = []
+        for key, value in ((TICKET_STATUS, status), (TICKET_PRIORITY, priority), (ASSIGNED_AGENT, agent),
+                           (ESCALATION_COUNT, escalations)):
+            if value is not None and published.get(key.name) != value:
+                published[key.name] = value
+                updates.append(key.value_set(value))
+        if updates:
+            workflow.upsert_search_attributes(updates)
+
+    def _record_escalation(self):
+        self._escalation_count += 1
+        self._upsert_ticket_state(escalations=self._escalation_count)
+
+    async def _release_held_agent(self, ticket):
+        """Release the held agent, if any. Safe to call again from a finally block: a second call is a no-op."""
+        agent = self._held_agent
+        if agent is None:
+            return
+        await self.do_release_agent(agent, ticket)
+        self._held_agent = None
+
+    async def _execute_activity(self, activity_call, *args, **kwargs):
+        policy = ACTIVITY_POLICIES.get(activity_call, ExecutionPolicy())
+        timeout = policy.start_to_close_timeout
+        adaptive = (self._options.activity_timeouts or {}).get(activity_call.__name__)
+        if adaptive is not None:
+            timeout = min(timeout, timedelta(seconds=adaptive))
+        if policy.local and self._options.local_activities:
+            kwargs.pop("task_queue", None)
+            return await workflow.execute_local_activity(
+                activity_call,
+                args=list(args),
+                start_to_close_timeout=timeout,
+                retry_policy=policy.retry_policy,
+                **kwargs
+            )
         return await workflow.execute_activity(
             activity_call,
             args=list(args),
-            start_to_close_timeout=timedelta(minutes=5),
-            retry_policy=RetryPolicy(
-                maximum_attempts=3,
-                initial_interval=timedelta(seconds=1),
-                maximum_interval=timedelta(seconds=10),
-                backoff_coefficient=2.0,
-            ),
+            start_to_close_timeout=timeout,
+            retry_policy=policy.retry_policy,
+            heartbeat_timeout=policy.heartbeat_timeout,
             **kwargs
         )
 
+    async def do_parallel(
+        self,
+        *steps: Awaitable,
+        compensations: Optional[Sequence[Optional[Callable[[object], Awaitable]]]] = None,
+        return_exceptions: bool = False,
+    ) -> List:
+        """Run independent do_* calls concurrently and return their results in order.
+
+        Every step runs to completion -- a failure doesn't cancel its siblings. If any step fails, the matching entry in
+        `compensations` is awaited with the result of each step that succeeded (in reverse order), then the first
+        failure in argument order is raised, or returned in place of its result when `return_exceptions` is set.
+        """
+        results = await asyncio.gather(*steps, return_exceptions=True)
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures and compensations:
+            for result, compensate in reversed(list(zip(results, compensations))):
+                if compensate and not isinstance(result, BaseException):
+                    await compensate(result)
+        if failures and not return_exceptions:
+            raise failures[0]
+        return list(results)
+
+    @staticmethod
+    def _agent_unavailable(error: Exception) -> bool:
+        """True when an activity failed because the agent pool had no free capacity"""
+        cause = getattr(error, "cause", None)
+        return isinstance(cause, ApplicationError) and cause.type == InvestigationResult.AGENT_UNAVAILABLE.value
+
+    async def _load_adaptive_timeouts(self):
+        """Fetch timeouts from recorded latencies once per ticket; the parent hands them to its child in the options"""
+        if not self._options.adaptive_timeouts or self._options.activity_timeouts is not None:
+            return
+        try:
+            timeouts = await self._execute_activity(
+                suggest_timeouts, ADAPTIVE_HEADROOM, ADAPTIVE_FLOOR.total_seconds(),
+                task_queue="internal",
+            )
+        except ActivityError as e:
+            # Only an optimization -- carry on with the static timeouts
+            workflow.logger.warn(f"Couldn't load adaptive timeouts: {e}")
+            return
+        workflow.logger.debug(f"Adaptive timeouts: {timeouts}")
+        self._options = replace(self._options, activity_timeouts=timeouts)
+
     # Activity wrappers - simplifies workflow code while unifying activity invocation
+    async def do_store_ticket(self, ticket):
+        ref = await self._execute_activity(
+            store_ticket, ticket,
+            task_queue="internal",
+        )
+        workflow.logger.debug(f"Stored ticket {ticket.ticket_id}")
+        return ref
+
     async def do_agent_resolve(self, ticket) -> str:
         resolve_result = await self._execute_activity(
             agent_resolve, ticket,
             task_queue="support",
         )
         workflow.logger.debug(f"{resolve_result}")
-        self._status = resolve_result
         return resolve_result
 
     async def do_assign_agent(self, ticket) -> str:
@@ -50,15 +236,15 @@ class WorkflowBase:
             task_queue="internal",
         )
         workflow.logger.debug(f"Assignment result: {assignment_result}")
-        self._status = assignment_result
         return assignment_result
 
-    async def do_notify_customer(self, ticket, message: str):
-        await self._execute_activity(
+    async def do_notify_customer(self, ticket, message: str) -> str:
+        delivery = await self._execute_activity(
             notify_customer, ticket, message,
             task_queue="support",
         )
-        workflow.logger.debug(f"Customer notified: {message}")
+        workflow.logger.debug(f"Customer notified: {message} ({delivery})")
+        return delivery
 
     async def do_search_knowledge_base(self, ticket) -> str:
         solution = await self._execute_activity(
@@ -66,7 +252,6 @@ class WorkflowBase:
             task_queue="support",
         )
         workflow.logger.debug(f"KB search successful: {solution}")
-        self._status = "searching_kb"
         return solution
 
     async def do_send_auto_response(self, ticket) -> str:
@@ -75,7 +260,6 @@ class WorkflowBase:
             task_queue="support",
         )
         workflow.logger.debug(f"Result: {auto_result}")
-        self._status = "auto_responding"
         return auto_result
 
     async def do_escalate_to_engineering(self, ticket) -> str:
@@ -84,7 +268,6 @@ class WorkflowBase:
             task_queue="internal",
         )
         workflow.logger.debug(f"{esc_result}")
-        self._status = esc_result
         return esc_result
 
     async def do_agent_investigate(self, ticket) -> str:
@@ -93,15 +276,15 @@ class WorkflowBase:
             task_queue="internal",
         )
         workflow.logger.debug(f"Investigation: {investigation_result}")
-        self._status = investigation_result
         return investigation_result
 
-    async def do_notify_management(self, ticket):
-        await self._execute_activity(
+    async def do_notify_management(self, ticket) -> str:
+        delivery = await self._execute_activity(
             notify_management, ticket,
             task_queue="support",
         )
-        workflow.logger.debug(f"Notifying management about ticket ({ticket.ticket_id}) status: {self._status}")
+        workflow.logger.debug(f"Notifying management about ticket ({ticket.ticket_id}) status: {self._status} ({delivery})")
+        return delivery
 
     async def do_apply_urgent_fix(self, ticket) -> str:
         fix_result = await self._execute_activity(
@@ -109,7 +292,6 @@ class WorkflowBase:
             task_queue="engineering",
         )
         workflow.logger.debug(f"Applying urgent fix result: {fix_result}")
-        self._status = fix_result
         return fix_result
 
     async def do_validate_resolution(self, ticket) -> str:
@@ -125,3 +307,14 @@ class WorkflowBase:
             release_agent, agent_name, ticket,
             task_queue="support",
         )
+
+
+class TicketHandler(WorkflowBase, abc.ABC):
+    """Base of the per-priority workflows, which SupportTicketSystem runs as children or inline"""
+    @workflow.query
+    def escalation_count(self) -> int:
+        return self._escalation_count
+
+    @abc.abstractmethod
+    async def handle(self, ticket) -> str:
+        """The priority-specific steps, run by the workflow itself or inline in SupportTicketSystem"""
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, fields
+from typing import Dict, List, Tuple, get_args
+
+from temporalio.api.enums.v1 import EventType
+from temporalio.client import Client, WorkflowHandle
+from temporalio.testing import WorkflowEnvironment
+
+from codec import add_converter_arguments, data_converter_from_args
+from models import Ticket, WorkflowOptions
+from profiles import load_profile, set_active_profile
+from results import LatencyCollector, build_report
+from run_temporal import DEMO_TICKETS, submit_tickets
+from search_attributes import TICKET_SEARCH_ATTRIBUTES
+from worker import build_workers
+from worker_config import load_worker_config
+
+# Metric -> which direction is better; anything moving the wrong way by more than the tolerance is a regression
+REGRESSION_CHECKS = {
+    "workflows_per_sec": "higher",
+    "activity_tasks_per_sec": "higher",
+    "history_events_per_ticket": "lower",
+    "history_bytes_per_ticket": "lower",
+    "cpu_seconds_per_ticket": "lower",
+    "max_rss_mb": "lower",
+}
+
+ACTIVITY_TASK_EVENTS = {
+    EventType.EVENT_TYPE_ACTIVITY_TASK_COMPLETED,
+    EventType.EVENT_TYPE_ACTIVITY_TASK_FAILED,
+    EventType.EVENT_TYPE_ACTIVITY_TASK_TIMED_OUT,
+    EventType.EVENT_TYPE_ACTIVITY_TASK_CANCELED,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse "low=0.5,medium=0.3,high=0.2" into normalized weights"""
+    weights = {}
+    for part in mix.split(","):
+        priority, _, weight = part.partition("=")
+        weights[priority.strip()] = float(weight)
+    total = sum(weights.values())
+    return {k: v / total for k, v in weights.items()}
+
+
+def generate_tickets(count: int, mix: Dict[str, float], seed: int) -> List[Ticket]:
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    priorities = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [
+        # Reuse the demo issues so the knowledge base hit rate looks like the demo's
+        Ticket(f"BENCH-{run_id}-{i:06d}", f"Customer {i}", DEMO_TICKETS[i % len(DEMO_TICKETS)].issue, priority)
+        for i, priority in enumerate(priorities, 1)
+    ]
+
+
+def max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def start_environment(args) -> Tuple[Client, WorkflowEnvironment]:
+    data_converter = data_converter_from_args(args)
+    if args.address:
+        return await Client.connect(args.address, data_converter=data_converter), None
+    if args.server == "local":
+        env = await WorkflowEnvironment.start_local(data_converter=data_converter,
+                                                    search_attributes=TICKET_SEARCH_ATTRIBUTES)
+    else:
+        env = await WorkflowEnvironment.start_time_skipping(data_converter=data_converter)
+    return env.client, env
+
+
+def _ticket_workflow_ids(handle: WorkflowHandle, ticket: Ticket, dispatch: str) -> Tuple[str, ...]:
+    # Inline dispatch never starts the priority child workflow
+    if dispatch == "inline":
+        return (handle.id,)
+    return handle.id, f"{ticket.priority}-{ticket.ticket_id}"
+
+
+async def count_history(client: Client, handles: List[Tuple[WorkflowHandle, Ticket]], dispatch: str = "child",
+                        concurrency: int = 50) -> Counter:
+    """Count history events, activity tasks, local activities, and history bytes across each ticket's workflows"""
+    counts = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def count_one(workflow_id: str, priority: str):
+        async with semaphore:
+            history = await client.get_workflow_handle(workflow_id).fetch_history()
+        counts["history_events"] += len(history.events)
+        history_bytes = sum(e.ByteSize() for e in history.events)
+        counts["history_bytes"] += history_bytes
+        counts[f"history_bytes_{priority}"] += history_bytes
+        counts["activity_tasks"] += sum(1 for e in history.events if e.event_type in ACTIVITY_TASK_EVENTS)
+        counts["local_activities"] += sum(1 for e in history.events if e.event_type == EventType.EVENT_TYPE_MARKER_RECORDED)
+
+    await asyncio.gather(*(
+        count_one(workflow_id, ticket.priority)
+        for handle, ticket in handles
+        for workflow_id in _ticket_workflow_ids(handle, ticket, dispatch)
+    ))
+    return counts
+
+
+async def hedge_outcomes(client: Client, handles: List[Tuple[WorkflowHandle, Ticket]], dispatch: str = "child",
+                         concurrency: int = 50) -> dict:
+    """Tally how the speculative agent assignment ended across the low-priority tickets"""
+    outcomes = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def query_one(handle: WorkflowHandle, ticket: Ticket):
+        workflow_id = _ticket_workflow_ids(handle, ticket, dispatch)[-1]
+        async with semaphore:
+            outcome = await client.get_workflow_handle(workflow_id).query("hedge_outcome")
+        outcomes[outcome] += 1
+
+    await asyncio.gather(*(query_one(handle, ticket) for handle, ticket in handles if ticket.priority == "low"))
+    total = sum(outcomes.values())
+    return {
+        "outcomes": dict(outcomes),
+        # Paid off: the KB missed and an agent was already being reserved, so the miss cost less than KB + assign
+        "payoff_rate": round(outcomes["paid_off"] / total, 4) if total else 0.0,
+        "wasted_rate": round(outcomes["wasted"] / total, 4) if total else 0.0,
+    }
+
+
+def _coerce(field_type, value: str):
+    # Optional[X] fields accept "none"; otherwise convert to X
+    args = [a for a in get_args(field_type) if a is not type(None)]
+    if args:
+        if value.lower() == "none":
+            return None
+        field_type = args[0]
+    if field_type is bool:
+        return value.lower() in ("1", "true", "yes", "on")
+    return field_type(value)
+
+
+def parse_variant(spec: str) -> Tuple[str, WorkflowOptions]:
+    """Parse "name:key=value,..." into a named set of WorkflowOptions, e.g. remote:local_activities=false"""
+    name, _, settings = spec.partition(":")
+    types = {f.name: f.type for f in fields(WorkflowOptions)}
+    overrides = {}
+    for setting in filter(None, settings.split(",")):
+        key, _, value = setting.partition("=")
+        key = key.strip()
+        if key not in types:
+            raise ValueError(f"Unknown workflow option: {key} (expected one of {', '.join(types)})")
+        overrides[key] = _coerce(types[key], value.strip())
+    return name, WorkflowOptions(**overrides)
+
+
+async def run_variant(client: Client, args, options: WorkflowOptions) -> dict:
+    tickets = generate_tickets(args.tickets, parse_mix(args.mix), args.seed)
+    handles = []
+    collector = LatencyCollector(args.concurrency)
+
+    def on_started(handle, ticket, submitted_at):
+        handles.append((handle, ticket))
+        collector.track(handle, ticket, submitted_at)
+
+    cpu_before = cpu_seconds()
+    started = time.monotonic()
+    summary = await submit_tickets(client, tickets, concurrency=args.concurrency, quiet=True,
+                                   on_started=on_started, options=options)
+    await collector.wait()
+    elapsed = time.monotonic() - started
+    cpu_used = cpu_seconds() - cpu_before
+
+    counts = await count_history(client, handles, options.dispatch)
+    completed = len(collector.results) - collector.errors
+    latency = build_report(collector.results)
+    ticket_count = max(1, len(handles))
+    metrics = {
+        "options": asdict(options),
+        "completed": completed,
+        "failed_to_start": summary.failed,
+        "elapsed_sec": round(elapsed, 3),
+        "workflows_per_sec": round(completed / elapsed, 2),
+        "activity_tasks_per_sec": round(counts["activity_tasks"] / elapsed, 2),
+        "history_events_per_ticket": round(counts["history_events"] / ticket_count, 2),
+        "activity_tasks_per_ticket": round(counts["activity_tasks"] / ticket_count, 2),
+        "local_activities_per_ticket": round(counts["local_activities"] / ticket_count, 2),
+        "history_bytes_per_ticket": round(counts["history_bytes"] / ticket_count, 1),
+        "history_bytes_by_priority": {
+            priority: round(counts[f"history_bytes_{priority}"] / count, 1)
+            for priority, count in Counter(ticket.priority for _, ticket in handles).items()
+        },
+        "cpu_seconds": round(cpu_used, 3),
+        "cpu_seconds_per_ticket": round(cpu_used / ticket_count, 5),
+        # ru_maxrss is a high-water mark, so later variants in the same run can only match or exceed earlier ones
+        "max_rss_mb": round(max_rss_mb(), 1),
+        "latency_p50": latency["overall"]["p50"],
+        "latency_p99": latency["overall"]["p99"],
+        "latency": latency["by_priority"],
+    }
+    if options.hedge_agent_after is not None:
+        metrics["hedge"] = await hedge_outcomes(client, handles, options.dispatch)
+    return metrics
+
+
+async def run_benchmark(args) -> dict:
+    set_active_profile(load_profile(args.profile, args.seed))
+    variants = [parse_variant(spec) for spec in args.variant] or [("default", WorkflowOptions())]
+
+    client, env = await start_environment(args)
+    workers = build_workers(client, load_worker_config(args.worker_config, args.overrides))
+    worker_tasks = [asyncio.create_task(w.run()) for w in workers]
+    try:
+        results = {}
+        for name, options in variants:
+            print(f"Running variant '{name}' ({args.tickets} tickets)...")
+            results[name] = await run_variant(client, args, options)
+    finally:
+        await asyncio.gather(*(w.shutdown() for w in workers))
+        await asyncio.gather(*worker_tasks, return_exceptions=True)
+        if env:
+            await env.shutdown()
+
+    return {
+        "tickets": args.tickets,
+        "mix": args.mix,
+        "profile": args.profile,
+        "payload_encoding": args.payload_encoding,
+        "server": args.address or args.server,
+        "variants": results,
+    }
+
+
+SIDE_BY_SIDE_METRICS = [
+    "workflows_per_sec", "activity_tasks_per_sec", "history_events_per_ticket", "activity_tasks_per_ticket",
+    "local_activities_per_ticket", "history_bytes_per_ticket", "cpu_seconds_per_ticket", "latency_p50", "latency_p99", "max_rss_mb",
+]
+
+
+def print_side_by_side(results: dict):
+    names = list(results["variants"])
+    print(f"\n{'metric':<30}" + "".join(f"{name:>18}" for name in names))
+    for metric in SIDE_BY_SIDE_METRICS:
+        print(f"{metric:<30}" + "".join(f"{results['variants'][name][metric]:>18}" for name in names))
+    for name in names:
+        by_priority = ", ".join(f"{p}={b}" for p, b in sorted(results["variants"][name]["history_bytes_by_priority"].items()))
+        print(f"[{name}] history bytes per ticket by priority: {by_priority}")
+        hedge = results["variants"][name].get("hedge")
+        if hedge:
+            print(f"[{name}] hedge paid off for {hedge['payoff_rate']:.1%} of low-priority tickets, "
+                  f"wasted an agent reservation for {hedge['wasted_rate']:.1%}: {hedge['outcomes']}")
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, variant in results["variants"].items():
+        expected = baseline.get("variants", {}).get(name)
+        if not expected:
+            continue
+        for metric, better in REGRESSION_CHECKS.items():
+            if not expected.get(metric):
+                continue
+            change = (variant[metric] - expected[metric]) / expected[metric]
+            if (better == "higher" and change < -tolerance) or (better == "lower" and change > tolerance):
+                regressions.append(f"[{name}] {metric}: {expected[metric]} -> {variant[metric]} ({change:+.1%})")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the support ticket workflows")
+    parser.add_argument("--tickets", type=int, default=200, help="Number of tickets to run per variant")
+    parser.add_argument("--mix", default="low=0.5,medium=0.3,high=0.2", help="Priority mix as priority=weight pairs")
+    parser.add_argument("--variant", action="append", default=[], metavar="NAME[:OPTION=VALUE,...]",
+                        help="Run the tickets with these WorkflowOptions (repeatable, compared side by side), "
+                             "e.g. --variant remote:local_activities=false --variant local:local_activities=true")
+    parser.add_argument("--profile", default="zero-latency", help="Activity latency/failure profile for the workers")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the ticket mix and the activity profile")
+    parser.add_argument("--worker-config", metavar="PATH", help="JSON file of per-task-queue worker settings")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="QUEUE.SETTING=VALUE",
+                        help="Override one worker setting (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Maximum workflow starts/results in flight")
+    parser.add_argument("--server", choices=["time-skipping", "local"], default="time-skipping",
+                        help="Test server to start: the time-skipping test server or the local dev server binary")
+    parser.add_argument("--address", help="Use an already running server at this address instead of starting one")
+    add_converter_arguments(parser)
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the results")
+    parser.add_argument("--baseline", help="Baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative change against the baseline before failing (default: 0.2)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results to --baseline")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    results = await run_benchmark(args)
+
+    print_side_by_side(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ REGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
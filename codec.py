@@ -0,0 +1,168 @@
+import argparse
+import dataclasses
+import struct
+import zlib
+from typing import Any, Iterable, List, Optional, Sequence, Type
+
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+    PayloadCodec,
+)
+
+from models import Ticket, TicketRef
+
+PAYLOAD_ENCODINGS = ("json", "compact", "compressed")
+
+TICKET_ENCODING = b"binary/ticket"
+TICKET_REF_ENCODING = b"binary/ticket-ref"
+ZLIB_ENCODING = b"binary/zlib"
+
+PRIORITY_CODES = {"low": 0, "medium": 1, "high": 2}
+PRIORITY_NAMES = {code: name for name, code in PRIORITY_CODES.items()}
+OTHER_PRIORITY = 255      # followed by the priority spelled out, so invalid tickets still round-trip
+
+_LENGTH = struct.Struct("<I")
+
+
+def _pack_strings(values: Iterable[str]) -> bytes:
+    parts = []
+    for value in values:
+        data = value.encode("utf-8")
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def _unpack_strings(data: bytes, offset: int) -> List[str]:
+    values = []
+    while offset < len(data):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        values.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return values
+
+
+def _encode(priority: str, fields: List[str]) -> bytes:
+    """One priority byte, then length-prefixed UTF-8 fields -- no field names or JSON quoting"""
+    code = PRIORITY_CODES.get(priority, OTHER_PRIORITY)
+    if code == OTHER_PRIORITY:
+        fields = fields + [priority]
+    return bytes([code]) + _pack_strings(fields)
+
+
+def _decode(data: bytes):
+    code = data[0]
+    fields = _unpack_strings(data, 1)
+    priority = fields.pop() if code == OTHER_PRIORITY else PRIORITY_NAMES[code]
+    return priority, fields
+
+
+def encode_ticket(ticket: Ticket) -> bytes:
+    return _encode(ticket.priority, [ticket.ticket_id, ticket.customer_name, ticket.issue])
+
+
+def decode_ticket(data: bytes) -> Ticket:
+    priority, (ticket_id, customer_name, issue) = _decode(data)
+    return Ticket(ticket_id, customer_name, issue, priority)
+
+
+def encode_ticket_ref(ref: TicketRef) -> bytes:
+    return _encode(ref.priority, [ref.ticket_id])
+
+
+def decode_ticket_ref(data: bytes) -> TicketRef:
+    priority, (ticket_id,) = _decode(data)
+    return TicketRef(ticket_id, priority)
+
+
+def _is_instance(value: Any, cls: type) -> bool:
+    # Match on the dataclass name as well as the class: the workflow sandbox may hold its own copy of models
+    return isinstance(value, cls) or (dataclasses.is_dataclass(value) and type(value).__name__ == cls.__name__)
+
+
+class TicketPayloadConverter(EncodingPayloadConverter):
+    @property
+    def encoding(self) -> str:
+        return TICKET_ENCODING.decode()
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        if not _is_instance(value, Ticket):
+            return None
+        return Payload(metadata={"encoding": TICKET_ENCODING}, data=encode_ticket(value))
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Ticket:
+        return decode_ticket(payload.data)
+
+
+class TicketRefPayloadConverter(EncodingPayloadConverter):
+    @property
+    def encoding(self) -> str:
+        return TICKET_REF_ENCODING.decode()
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        if not _is_instance(value, TicketRef):
+            return None
+        return Payload(metadata={"encoding": TICKET_REF_ENCODING}, data=encode_ticket_ref(value))
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> TicketRef:
+        return decode_ticket_ref(payload.data)
+
+
+class CompactPayloadConverter(CompositePayloadConverter):
+    """The SDK's default converters, with Tickets and TicketRefs tried first and written in the compact binary form"""
+    def __init__(self):
+        super().__init__(TicketPayloadConverter(), TicketRefPayloadConverter(),
+                         *DefaultPayloadConverter.default_encoding_payload_converters)
+
+
+class CompressionCodec(PayloadCodec):
+    """zlib-compresses payloads of at least `threshold` bytes, keeping the original whenever compression doesn't help"""
+    def __init__(self, threshold: int = 256, level: int = 6):
+        self.threshold = threshold
+        self.level = level
+
+    async def encode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        encoded = []
+        for payload in payloads:
+            raw = payload.SerializeToString()
+            if len(raw) >= self.threshold:
+                compressed = zlib.compress(raw, self.level)
+                if len(compressed) < len(raw):
+                    encoded.append(Payload(metadata={"encoding": ZLIB_ENCODING}, data=compressed))
+                    continue
+            encoded.append(payload)
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        decoded = []
+        for payload in payloads:
+            if payload.metadata.get("encoding") == ZLIB_ENCODING:
+                payload = Payload.FromString(zlib.decompress(payload.data))
+            decoded.append(payload)
+        return decoded
+
+
+def build_data_converter(encoding: str = "compressed", threshold: int = 256) -> DataConverter:
+    """Client and workers must agree on this -- a "json" worker can't read compact or compressed payloads"""
+    if encoding == "json":
+        return DataConverter.default
+    converter = DataConverter(payload_converter_class=CompactPayloadConverter)
+    if encoding == "compressed":
+        converter = dataclasses.replace(converter, payload_codec=CompressionCodec(threshold))
+    return converter
+
+
+def add_converter_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--payload-encoding", choices=PAYLOAD_ENCODINGS, default="compressed",
+                        help="json: SDK default; compact: binary Tickets; compressed: compact plus zlib for large payloads")
+    parser.add_argument("--compression-threshold", type=int, default=256,
+                        help="Only compress payloads of at least this many bytes")
+
+
+def data_converter_from_args(args: argparse.Namespace) -> DataConverter:
+    return build_data_converter(args.payload_encoding, args.compression_threshold)
@@ -0,0 +1,160 @@
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from results import percentile
+
+# Spans come from different clocks (worker vs. server timestamps), so allow a little slack when chaining them
+CLOCK_SLACK = 0.05
+
+# Time on the critical path that no activity accounts for: workflow tasks, retry backoff, timers, child workflow starts
+WORKFLOW_OVERHEAD = "(workflow)"
+
+
+def _owner(span: dict, children: Dict[str, List[dict]]) -> Optional[str]:
+    """The root workflow ID of the run a span belongs to. Child workflow IDs repeat whenever a ticket ID does, so a
+    child's spans go to the parent of the run of that child that was open at the time."""
+    runs = children.get(span.get("workflow_id"))
+    if not runs:
+        return span.get("workflow_id")
+    run = next((r for r in runs if r["started"] - CLOCK_SLACK <= span["started"]
+                and span["completed"] <= r["completed"] + CLOCK_SLACK), None)
+    return run["parent_id"] if run else None
+
+
+def load_spans(path: str) -> Dict[str, List[dict]]:
+    """Spans from a trace file, grouped by the root workflow ID of the ticket run they belong to"""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    children = defaultdict(list)
+    for span in spans:
+        if span["kind"] == "workflow" and span.get("parent_id"):
+            children[span["workflow_id"]].append(span)
+
+    runs = defaultdict(list)
+    for span in spans:
+        owner = _owner(span, children)
+        if owner is not None:
+            runs[owner].append(span)
+    return runs
+
+
+def critical_path(spans: List[dict]) -> Optional[Tuple[dict, List[Tuple[str, str, float]]]]:
+    """A ticket run's root workflow span and its critical path as (step, "queue"/"run"/"", seconds), earliest first.
+
+    Walks back from the end of the root workflow, each time taking the activity attempt that finished last before
+    the current point; whatever gaps are left over are charged to the workflow itself.
+    """
+    roots = [s for s in spans if s["kind"] == "workflow" and not s.get("parent_id")]
+    if not roots:
+        return None
+    # A workflow retried after a failure writes a span per attempt; the last one is the run that finished
+    root = max(roots, key=lambda s: s["completed"])
+    remaining = sorted((s for s in spans if s["kind"] == "activity" and s["completed"] >= root["started"]),
+                       key=lambda s: s["completed"])
+    cursor = root["completed"]
+    path = []
+    while True:
+        candidates = [s for s in remaining if s["completed"] <= cursor + CLOCK_SLACK and s["scheduled"] < cursor]
+        if not candidates:
+            break
+        span = candidates[-1]
+        remaining.remove(span)
+        if cursor - span["completed"] > 0:
+            path.append((WORKFLOW_OVERHEAD, "", cursor - span["completed"]))
+        path.append((span["name"], "run", max(0.0, span["completed"] - span["started"])))
+        path.append((span["name"], "queue", max(0.0, span["started"] - span["scheduled"])))
+        cursor = span["scheduled"]
+    if cursor - root["started"] > 0:
+        path.append((WORKFLOW_OVERHEAD, "", cursor - root["started"]))
+    path.reverse()
+    return root, path
+
+
+def analyze(runs: Dict[str, List[dict]]) -> dict:
+    """Per priority: ticket count, total latency percentiles, and each step's share of critical-path time"""
+    totals = defaultdict(list)
+    step_time = defaultdict(lambda: defaultdict(float))
+    for spans in runs.values():
+        found = critical_path(spans)
+        if found is None:
+            continue
+        root, path = found
+        priority = root.get("priority") or "unknown"
+        totals[priority].append(root["completed"] - root["started"])
+        for step, component, seconds in path:
+            step_time[priority][f"{step} {component}".strip()] += seconds
+
+    report = {}
+    for priority, values in sorted(totals.items()):
+        values.sort()
+        total = sum(values)
+        steps = sorted(step_time[priority].items(), key=lambda x: x[1], reverse=True)
+        report[priority] = {
+            "tickets": len(values),
+            "p50": round(percentile(values, 50), 3),
+            "p99": round(percentile(values, 99), 3),
+            "mean": round(total / len(values), 3),
+            "steps": {step: {"mean_seconds": round(seconds / len(values), 3),
+                             "share": round(seconds / total, 4) if total else 0.0}
+                      for step, seconds in steps if seconds > 0},
+        }
+    return report
+
+
+def print_analysis(report: dict):
+    for priority, stats in report.items():
+        print(f"\n{priority}: {stats['tickets']} tickets, mean {stats['mean']}s, p50 {stats['p50']}s, p99 {stats['p99']}s")
+        for step, step_stats in stats["steps"].items():
+            print(f"  {step:<40} {step_stats['mean_seconds']:>9.3f}s {step_stats['share']:>7.1%}")
+
+
+def _ticket_id(spans: List[dict], workflow_id: str) -> Optional[str]:
+    return next((s.get("ticket_id") for s in spans if s["workflow_id"] == workflow_id), None)
+
+
+def print_ticket(spans: List[dict]):
+    found = critical_path(spans)
+    if found is None:
+        print("No root workflow span for that ticket")
+        return
+    root, path = found
+    print(f"{root['ticket_id']} ({root.get('priority')}, {root['workflow_id']}): "
+          f"{root['completed'] - root['started']:.3f}s")
+    for step, component, seconds in path:
+        print(f"  {step:<30} {component:<6} {seconds:>9.3f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Critical-path analysis of the spans in a worker trace file")
+    parser.add_argument("trace", help="JSONL trace written by the workers' --trace-file")
+    parser.add_argument("--ticket", help="Print the critical path of one ticket (every run of it) or parent workflow ID "
+                                         "instead of the per-priority summary")
+    parser.add_argument("--json", metavar="PATH", help="Also write the per-priority summary as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    runs = load_spans(args.trace)
+    if args.ticket:
+        # A ticket ID that repeats across runs gets a path per run; a workflow ID picks out one
+        matching = [spans for workflow_id, spans in runs.items()
+                    if args.ticket == workflow_id or _ticket_id(spans, workflow_id) == args.ticket]
+        for spans in matching or [[]]:
+            print_ticket(spans)
+        return
+    report = analyze(runs)
+    print_analysis(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import csv
+import json
+import logging
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import BinaryIO, Iterator, Optional
+
+from models import Ticket
+
+TICKET_FIELDS = [f.name for f in fields(Ticket)]
+PRIORITIES = {"low", "medium", "high"}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestStats:
+    read: int = 0
+    malformed: int = 0
+
+
+def ticket_from_record(record) -> Ticket:
+    """Validate a parsed record into a Ticket, raising ValueError if it doesn't fit"""
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    missing = [name for name in TICKET_FIELDS if not record.get(name)]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    ticket = Ticket(**{name: str(record[name]).strip() for name in TICKET_FIELDS})
+    ticket.priority = ticket.priority.lower()
+    if ticket.priority not in PRIORITIES:
+        raise ValueError(f"invalid priority: {ticket.priority}")
+    return ticket
+
+
+def _decoded_lines(stream: BinaryIO) -> Iterator[tuple]:
+    """(line number, text or UnicodeDecodeError) per line, so one bad byte costs its line rather than the stream"""
+    for line_no, raw in enumerate(stream, 1):
+        try:
+            yield line_no, raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            yield line_no, e
+
+
+def _jsonl_records(stream: BinaryIO) -> Iterator[tuple]:
+    for line_no, line in _decoded_lines(stream):
+        if isinstance(line, Exception):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+
+
+def _csv_records(stream: BinaryIO) -> Iterator[tuple]:
+    # A quoted field can span lines, so undecodable lines are noted and the record they fall in is rejected
+    undecodable = {}
+
+    def lines():
+        for line_no, line in _decoded_lines(stream):
+            if isinstance(line, Exception):
+                undecodable[line_no] = line
+                line = line.object.decode("utf-8", errors="replace")
+            yield line
+
+    reader = csv.DictReader(lines())
+    last_line = 0
+    for record in reader:
+        errors = [undecodable.pop(n) for n in range(last_line + 1, reader.line_num + 1) if n in undecodable]
+        last_line = reader.line_num
+        yield reader.line_num, errors[0] if errors else record
+
+
+@contextmanager
+def _open_source(path: str):
+    """Bytes, not text: lines are decoded one at a time"""
+    if path == "-":
+        yield sys.stdin.buffer
+    else:
+        with open(path, "rb") as stream:
+            yield stream
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def stream_tickets(path: str, fmt: Optional[str] = None, stats: Optional[IngestStats] = None) -> Iterator[Ticket]:
+    """Lazily yield Tickets from a JSONL or CSV file ("-" for stdin), skipping malformed lines"""
+    stats = stats if stats is not None else IngestStats()
+    fmt = fmt or detect_format(path)
+    with _open_source(path) as stream:
+        records = _csv_records(stream) if fmt == "csv" else _jsonl_records(stream)
+        for line_no, record in records:
+            stats.read += 1
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(str(record))
+                ticket = ticket_from_record(record)
+            except ValueError as e:
+                stats.malformed += 1
+                logger.warning(f"Skipping malformed ticket on line {line_no} of {path}: {e}")
+                continue
+            yield ticket
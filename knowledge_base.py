@@ -0,0 +1,223 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+
+DEFAULT_KB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kb_articles")
+ARTICLE_EXTENSIONS = (".md", ".txt")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "can't", "cant", "do", "doesn't", "don't", "for",
+    "from", "has", "have", "he", "her", "his", "i", "if", "in", "is", "it", "it's", "me", "my", "no", "not", "of", "on", "or", "our", "she", "so",
+    "that", "the", "their", "there", "this", "to", "too", "was", "we", "what", "when", "where", "which", "who",
+    "will", "with", "won't", "you", "your",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+@dataclass
+class Article:
+    article_id: str
+    title: str
+    path: str
+    mtime: float
+    length: int
+    terms: frozenset
+
+
+class KnowledgeBase:
+    """BM25-ranked inverted index over the articles in a directory.
+
+    Built once per worker process; `refresh()` re-indexes only the files that were added, changed, or removed.
+    """
+    def __init__(self, directory: str = DEFAULT_KB_DIR, k1: float = 1.2, b: float = 0.75,
+                 min_score: float = 2.0, min_coverage: float = 0.4):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        # A hit needs a decent score *and* to match a good share of the query, so one rare word isn't enough
+        self.min_score = min_score
+        self.min_coverage = min_coverage
+        self._articles: Dict[str, Article] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)   # term -> {article_id: term frequency}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._change_listeners: List[Callable[[], None]] = []
+        self.refresh()
+
+    def add_change_listener(self, listener: Callable[[], None]):
+        """Call `listener` whenever a refresh adds, changes, or removes an article"""
+        self._change_listeners.append(listener)
+
+    def __len__(self):
+        return len(self._articles)
+
+    def _scan(self) -> Dict[str, Tuple[str, float]]:
+        found = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(ARTICLE_EXTENSIONS):
+                    article_id = os.path.splitext(entry.name)[0]
+                    found[article_id] = (entry.path, entry.stat().st_mtime)
+        return found
+
+    def _remove(self, article_id: str):
+        article = self._articles.pop(article_id)
+        self._total_length -= article.length
+        for term in article.terms:
+            postings = self._postings[term]
+            del postings[article_id]
+            if not postings:
+                del self._postings[term]
+
+    def _add(self, article_id: str, path: str, mtime: float, text: str):
+        title = text.lstrip("# ").split("\n", 1)[0].strip()
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, count in counts.items():
+            self._postings[term][article_id] = count
+        self._articles[article_id] = Article(article_id, title, path, mtime, len(terms), frozenset(counts))
+        self._total_length += len(terms)
+
+    @staticmethod
+    def _read(path: str) -> str:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def read_changes(self) -> Tuple[List[str], List[Tuple[str, str, float, str]]]:
+        """Scan the directory and read added or changed articles without touching the index, so this (the blocking
+        part of a refresh) can run on another thread. Returns (removed IDs, [(ID, path, mtime, text)])."""
+        self._last_refresh = time.monotonic()
+        found = self._scan()
+        known = {article.article_id: article.mtime for article in list(self._articles.values())}
+        removed = [article_id for article_id in known if article_id not in found]
+        changed = [(article_id, path, mtime, self._read(path))
+                   for article_id, (path, mtime) in found.items() if known.get(article_id) != mtime]
+        return removed, changed
+
+    def apply_changes(self, changes: Tuple[List[str], List[Tuple[str, str, float, str]]]) -> int:
+        """Update the index from read_changes(); returns the number of articles (re)indexed or removed"""
+        removed, changed = changes
+        count = 0
+        with self._lock:
+            # Another refresh may have applied some of these already
+            for article_id in removed:
+                if article_id in self._articles:
+                    self._remove(article_id)
+                    count += 1
+            for article_id, path, mtime, text in changed:
+                existing = self._articles.get(article_id)
+                if existing and existing.mtime == mtime:
+                    continue
+                if existing:
+                    self._remove(article_id)
+                self._add(article_id, path, mtime, text)
+                count += 1
+        if count:
+            for listener in self._change_listeners:
+                listener()
+        return count
+
+    def refresh(self) -> int:
+        """Bring the index in line with the directory; returns the number of articles (re)indexed or removed"""
+        return self.apply_changes(self.read_changes())
+
+    def is_stale(self, max_age: float = 5.0) -> bool:
+        return time.monotonic() - self._last_refresh >= max_age
+
+    def search(self, query: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """Ranked (article_id, score) pairs for the query, best first"""
+        if not self._articles:
+            return []
+        n = len(self._articles)
+        avg_length = self._total_length / n
+        scores = defaultdict(float)
+        matched = Counter()
+        query_terms = set(tokenize(query))
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for article_id, tf in postings.items():
+                length = self._articles[article_id].length
+                matched[article_id] += 1
+                scores[article_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+        needed = self.min_coverage * len(query_terms)
+        ranked = sorted(
+            ((a, s) for a, s in scores.items() if s >= self.min_score and matched[a] >= needed),
+            key=lambda x: x[1], reverse=True,
+        )
+        return ranked[:limit]
+
+    def title(self, article_id: str) -> str:
+        return self._articles[article_id].title
+
+
+def cache_key(issue: str) -> str:
+    # Search only depends on the set of query terms, so anything that tokenizes the same shares an entry
+    return " ".join(sorted(set(tokenize(issue))))
+
+
+class CachedKnowledgeBase:
+    """Search results cached by normalized issue text; misses are kept for a shorter TTL than hits"""
+    def __init__(self, knowledge_base: KnowledgeBase, maxsize: int = 10_000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.knowledge_base = knowledge_base
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize, ttl)
+        knowledge_base.add_change_listener(self.invalidate)
+
+    def __len__(self):
+        return len(self.knowledge_base)
+
+    def is_stale(self, max_age: float = 5.0) -> bool:
+        return self.knowledge_base.is_stale(max_age)
+
+    def read_changes(self):
+        return self.knowledge_base.read_changes()
+
+    def apply_changes(self, changes) -> int:
+        return self.knowledge_base.apply_changes(changes)
+
+    def search(self, query: str, limit: int = 3) -> List[Tuple[str, float]]:
+        key = (cache_key(query), limit)
+        results = self.cache.get(key)
+        if results is None:
+            results = self.knowledge_base.search(query, limit)
+            self.cache.set(key, results, None if results else self.negative_ttl)
+        return results
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+
+_knowledge_base: Optional[CachedKnowledgeBase] = None
+_kb_directory = DEFAULT_KB_DIR
+_cache_settings = {}
+
+
+def configure_knowledge_base(directory: str, **cache_settings):
+    """Point this process at a different article directory and cache settings; the index is (re)built on next use"""
+    global _knowledge_base, _kb_directory, _cache_settings
+    _kb_directory = directory
+    _cache_settings = cache_settings
+    _knowledge_base = None
+
+
+def get_knowledge_base() -> CachedKnowledgeBase:
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = CachedKnowledgeBase(KnowledgeBase(_kb_directory), **_cache_settings)
+    return _knowledge_base
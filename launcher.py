@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import logging
+import logging.handlers
+import multiprocessing
+import signal
+import time
+from datetime import timedelta
+from typing import Dict
+
+from temporalio.client import Client
+
+from codec import data_converter_from_args
+from metrics import metrics_runtime
+from worker import add_worker_arguments, build_workers, configure_process, start_instrumentation
+from worker_config import TASK_QUEUES, load_worker_config
+
+LOG_FORMAT = "%(asctime)s %(processName)-16s %(levelname)-7s %(name)s: %(message)s"
+
+DEFAULT_PROCESSES = "workflows=1,support=1,internal=1,engineering=1"
+
+
+def parse_processes(spec: str) -> Dict[str, int]:
+    """Parse "workflows=4,support=2" into a process count per task queue"""
+    counts = {}
+    for part in spec.split(","):
+        queue, _, count = part.partition("=")
+        queue = queue.strip()
+        if queue not in TASK_QUEUES:
+            raise ValueError(f"Unknown task queue: {queue} (expected one of {', '.join(TASK_QUEUES)})")
+        counts[queue] = int(count)
+    return counts
+
+
+def _run_worker_process(task_queue: str, index: int, port_offset: int, args: argparse.Namespace, log_queue):
+    """Entry point for one worker process: its own client connection, serving a single task queue"""
+    # Everything goes to the parent, which writes one interleaved log
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    # Ctrl-C reaches the whole process group; let the launcher decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_serve(task_queue, index, port_offset, args))
+
+
+async def _serve(task_queue: str, index: int, port_offset: int, args: argparse.Namespace):
+    # Offset the seed so processes don't all draw the same random sequence
+    configure_process(args, seed_offset=index)
+
+    # Each process serves its metrics on its own port: --metrics-address plus the process's position in the launcher
+    runtime = metrics_runtime(args.metrics_address, port_offset)
+    client = await Client.connect(
+        args.address,
+        data_converter=data_converter_from_args(args),
+        runtime=runtime,
+    )
+    [worker] = build_workers(
+        client,
+        load_worker_config(args.worker_config, args.overrides),
+        [task_queue],
+        graceful_shutdown_timeout=timedelta(seconds=args.graceful_timeout),
+    )
+
+    instrumentation = start_instrumentation(args, runtime, port_offset)
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+    run_task = asyncio.create_task(worker.run())
+    logging.info(f"Worker for task queue '{task_queue}' ready")
+    stop_task = asyncio.create_task(stop.wait())
+    await asyncio.wait([run_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+    if run_task.done():
+        # The worker died on its own -- surface the error so the launcher sees a non-zero exit
+        stop_task.cancel()
+        await run_task
+        return
+
+    logging.info(f"Shutting down worker for task queue '{task_queue}'")
+    await worker.shutdown()
+    await run_task
+    instrumentation.stop()
+
+
+class Launcher:
+    """Starts worker processes per task queue and shuts them all down together"""
+    def __init__(self, args: argparse.Namespace, processes: Dict[str, int]):
+        self._args = args
+        self._processes = processes
+        self._context = multiprocessing.get_context("spawn")
+        self._log_queue = self._context.Queue()
+        self._children = []
+        self._stopping = False
+        self._stop_deadline = None
+
+    def start(self):
+        for task_queue, count in self._processes.items():
+            for index in range(count):
+                process = self._context.Process(
+                    target=_run_worker_process,
+                    args=(task_queue, index, len(self._children), self._args, self._log_queue),
+                    name=f"{task_queue}-{index}",
+                )
+                process.start()
+                self._children.append(process)
+        logging.info(f"Started {len(self._children)} worker processes: "
+                     + ", ".join(f"{q}×{n}" for q, n in self._processes.items()))
+
+    def request_stop(self, signum=None, frame=None):
+        if self._stopping:
+            return
+        self._stopping = True
+        self._stop_deadline = time.monotonic() + self._args.graceful_timeout + 10
+        logging.info("Stopping worker processes...")
+        for process in self._children:
+            if process.is_alive():
+                process.terminate()
+
+    def wait(self):
+        # If any worker dies unexpectedly, take the rest down with it rather than running short-handed
+        while any(p.is_alive() for p in self._children):
+            for process in self._children:
+                if not process.is_alive() and process.exitcode != 0 and not self._stopping:
+                    logging.error(f"Worker process {process.name} exited with code {process.exitcode}")
+                    self.request_stop()
+            time.sleep(0.5)
+            if self._stopping and time.monotonic() > self._stop_deadline:
+                break
+
+        for process in self._children:
+            if process.is_alive():
+                logging.warning(f"Worker process {process.name} did not stop in time -- killing it")
+                process.kill()
+            process.join()
+
+    def run(self) -> int:
+        listener = logging.handlers.QueueListener(self._log_queue, *logging.getLogger().handlers)
+        listener.start()
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        try:
+            self.start()
+            self.wait()
+        finally:
+            listener.stop()
+        return 0 if all(p.exitcode == 0 for p in self._children) else 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Temporal workers across multiple processes")
+    parser.add_argument("--processes", default=DEFAULT_PROCESSES,
+                        help=f"Processes per task queue, e.g. workflows=4,support=2 (default: {DEFAULT_PROCESSES})")
+    parser.add_argument("--address", default="localhost:7233", help="Temporal server address")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="Seconds a stopping worker waits for in-flight activities before cancelling them")
+    add_worker_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    args = parse_args()
+    raise SystemExit(Launcher(args, parse_processes(args.processes)).run())
+
+
+if __name__ == "__main__":
+    main()
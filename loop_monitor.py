@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from temporalio.common import MetricMeter
+
+logger = logging.getLogger(__name__)
+
+
+def _folded(frame) -> str:
+    """One stack as "outer;...;inner" -- the format flame graph tools read"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class LoopMonitor:
+    """Measures event loop lag and catches whatever is blocking the loop.
+
+    A task on the loop wakes every `interval` and records how late it woke. A watchdog thread checks that the loop
+    has ticked recently; if it has been stuck for `threshold` seconds it logs the loop thread's stack once per stall,
+    naming the activity found on it.
+    """
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, meter: Optional[MetricMeter] = None,
+                 activity_names: Iterable[str] = ()):
+        self.interval = interval
+        self.threshold = threshold
+        self.activity_names = set(activity_names)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stalls = 0
+        self._lag_histogram = meter.create_histogram("ticket_event_loop_lag", "How late the loop ran a due callback", "ms") if meter else None
+        self._stall_counter = meter.create_counter("ticket_event_loop_stalls", "Times the loop was blocked past the threshold") if meter else None
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    def loop_stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame else None
+
+    def stats(self) -> dict:
+        return {"last_lag": round(self.last_lag, 4), "max_lag": round(self.max_lag, 4), "stalls": self.stalls}
+
+    async def _measure(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self.last_lag = max(0.0, now - started - self.interval)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            if self._lag_histogram:
+                self._lag_histogram.record(int(self.last_lag * 1000))
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.threshold / 2):
+            stuck_since = self._last_tick
+            if time.monotonic() - stuck_since < self.threshold + self.interval or reported == stuck_since:
+                continue
+            reported = stuck_since
+            self.stalls += 1
+            if self._stall_counter:
+                self._stall_counter.add(1)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            culprit = self._activity_on_stack(frame)
+            logger.warning(f"Event loop blocked for more than {self.threshold}s"
+                           f"{f' in activity {culprit}' if culprit else ''}; loop thread stack:\n"
+                           + ("".join(traceback.format_stack(frame)) if frame else "(unavailable)"))
+
+    def _activity_on_stack(self, frame) -> Optional[str]:
+        while frame is not None:
+            if frame.f_code.co_name in self.activity_names:
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return None
+
+
+class SamplingProfiler:
+    """Samples the loop thread's stack from a background thread and counts folded stacks; off until started"""
+    def __init__(self, thread_id: int, interval: float = 0.01):
+        self.thread_id = thread_id
+        self.interval = interval
+        self._samples: Counter = Counter()
+        self._stop: Optional[threading.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._stop is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._samples = Counter()
+        self._stop = threading.Event()
+        threading.Thread(target=self._sample, args=(self._stop,), name="sampling-profiler", daemon=True).start()
+
+    def stop(self) -> Counter:
+        if self._stop:
+            self._stop.set()
+            self._stop = None
+        return self._samples
+
+    def _sample(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._samples[_folded(frame)] += 1
+
+    def profile_for(self, seconds: float) -> Counter:
+        """Blocking: sample for `seconds` and return the counts; for callers off the loop thread"""
+        self.start()
+        time.sleep(seconds)
+        return self.stop()
+
+
+def format_folded(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class Instrumentation:
+    """Loop monitor plus the on-demand profiler, reachable by signal and, optionally, a local HTTP endpoint.
+
+    `reporters` are any other periodic tasks (start()/stop()) that should run and stop alongside the monitor.
+    """
+    def __init__(self, monitor: LoopMonitor, profile_dir: str = ".", reporters: Iterable = ()):
+        self.monitor = monitor
+        self.reporters = list(reporters)
+        self.profile_dir = profile_dir
+        self.profiler: Optional[SamplingProfiler] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self, debug_address: Optional[str] = None):
+        self.monitor.start()
+        for reporter in self.reporters:
+            reporter.start()
+        self.profiler = SamplingProfiler(threading.get_ident())
+        # SIGUSR1 starts sampling; the next SIGUSR1 writes the profile out
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.toggle_profiler)
+        if debug_address:
+            host, _, port = debug_address.rpartition(":")
+            self._server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _handler_for(self))
+            threading.Thread(target=self._server.serve_forever, name="debug-http", daemon=True).start()
+            logger.info(f"Debug endpoint at http://{host or '127.0.0.1'}:{port}/ (/lag, /stack, /profile?seconds=N)")
+
+    def stop(self):
+        self.monitor.stop()
+        for reporter in self.reporters:
+            reporter.stop()
+        if self._server:
+            self._server.shutdown()
+
+    def toggle_profiler(self):
+        if not self.profiler.running:
+            self.profiler.start()
+            logger.info("Sampling profiler started; send SIGUSR1 again to write the profile")
+            return
+        path = os.path.join(self.profile_dir, f"profile-{os.getpid()}-{int(time.time())}.folded")
+        with open(path, "w") as f:
+            f.write(format_folded(self.profiler.stop()))
+        logger.info(f"Sampling profile written to {path}")
+
+
+def _handler_for(instrumentation: Instrumentation):
+    class DebugHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/lag":
+                self._reply(json.dumps(instrumentation.monitor.stats()), "application/json")
+            elif url.path == "/stack":
+                self._reply(instrumentation.monitor.loop_stack() or "", "text/plain")
+            elif url.path == "/profile":
+                seconds = float(parse_qs(url.query).get("seconds", ["10"])[0])
+                if instrumentation.profiler.running:
+                    self.send_error(409, "Profiler already running")
+                    return
+                self._reply(format_folded(instrumentation.profiler.profile_for(min(seconds, 300))), "text/plain")
+            else:
+                self.send_error(404)
+
+        def _reply(self, body: str, content_type: str):
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return DebugHandler
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Type
+
+from temporalio import activity, workflow
+from temporalio.common import MetricMeter
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ExecuteActivityInput,
+    ExecuteWorkflowInput,
+    Interceptor,
+    WorkflowInboundInterceptor,
+    WorkflowInterceptorClassInput,
+)
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds; schedule-to-start on a healthy queue sits at the low end, a backed-up one climbs into the seconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000]
+
+HISTOGRAMS = (
+    "ticket_activity_schedule_to_start_latency",
+    "ticket_activity_execution_latency",
+    "ticket_workflow_duration",
+)
+
+
+def metrics_runtime(address: Optional[str], port_offset: int = 0) -> Runtime:
+    """A runtime that serves the SDK's own metrics and ours in Prometheus format at `address` (host:port).
+
+    Worker processes on one host need their own ports, hence `port_offset`.
+    """
+    if not address:
+        return Runtime.default()
+    host, _, port = address.rpartition(":")
+    return Runtime(telemetry=TelemetryConfig(metrics=PrometheusConfig(
+        bind_address=f"{host}:{int(port) + port_offset}",
+        histogram_bucket_overrides={name: LATENCY_BUCKETS_MS for name in HISTOGRAMS},
+    )))
+
+
+def _ms(delta: timedelta) -> int:
+    return max(0, int(delta.total_seconds() * 1000))
+
+
+class MetricsInterceptor(Interceptor):
+    """Per-activity counts, failures, and latency histograms, plus workflow outcomes by priority.
+
+    Recorded through the SDK's metric meters, which already label activity metrics with task queue and activity type,
+    and skip recording while a workflow is replaying.
+    """
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetrics(next)
+
+    def workflow_interceptor_class(self, input: WorkflowInterceptorClassInput) -> Optional[Type[WorkflowInboundInterceptor]]:
+        return _WorkflowMetrics
+
+
+class _ActivityMetrics(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput):
+        info = activity.info()
+        meter = activity.metric_meter().with_additional_attributes({"local": str(info.is_local).lower()})
+        meter.create_counter("ticket_activity_started", "Activity attempts started").add(1)
+        # Time spent waiting on the task queue for a worker slot -- the number to size each queue's workers by
+        meter.create_histogram(
+            "ticket_activity_schedule_to_start_latency", "Scheduled to started, per attempt", "ms"
+        ).record(_ms(info.started_time - info.current_attempt_scheduled_time))
+
+        execution = meter.create_histogram("ticket_activity_execution_latency", "Started to finished, per attempt", "ms")
+        started = time.monotonic()
+        try:
+            result = await super().execute_activity(input)
+        except asyncio.CancelledError:
+            # Cancelled by the workflow or the worker shutting down -- not the activity failing
+            meter.create_counter("ticket_activity_cancelled", "Activity attempts cancelled").add(1)
+            raise
+        except Exception as e:
+            # ApplicationErrors carry a type (e.g. agent_unavailable) that says more than the class name
+            meter.create_counter("ticket_activity_failed", "Activity attempts that raised").add(
+                1, {"error": getattr(e, "type", None) or type(e).__name__})
+            raise
+        finally:
+            execution.record(int((time.monotonic() - started) * 1000))
+        return result
+
+
+class _WorkflowMetrics(WorkflowInboundInterceptor):
+    async def execute_workflow(self, input: ExecuteWorkflowInput):
+        ticket = input.args[0] if input.args else None
+        priority = getattr(ticket, "priority", "unknown")
+        meter = workflow.metric_meter().with_additional_attributes({"priority": priority})
+        try:
+            result = await super().execute_workflow(input)
+        except asyncio.CancelledError:
+            meter.create_counter("ticket_workflow_cancelled", "Workflow runs cancelled").add(1)
+            raise
+        except Exception as e:
+            # Exception rather than BaseException: eviction from the worker's cache isn't the end of the run
+            meter.create_counter("ticket_workflow_failed", "Workflow runs that raised").add(1, {"error": type(e).__name__})
+            raise
+        # Results read like "Resolved by agent: TEMP-001"; the part before the colon is the outcome
+        outcome = str(result).split(":", 1)[0].strip() or "none"
+        meter.create_counter("ticket_workflow_completed", "Workflow runs by outcome").add(1, {"outcome": outcome})
+        meter.create_histogram("ticket_workflow_duration", "Workflow start to completion", "ms").record(
+            _ms(workflow.now() - workflow.info().start_time))
+        return result
+
+
+class CacheStatsReporter:
+    """Publishes each cache's size, hits, misses, and evictions as gauges, and logs them, every `interval` seconds"""
+    def __init__(self, caches: Dict[str, TTLCache], meter: Optional[MetricMeter] = None, interval: float = 60.0):
+        self.caches = caches
+        self.interval = interval
+        self._gauges = {
+            field: meter.create_gauge(f"ticket_cache_{field}", description)
+            for field, description in (("size", "Entries in the cache"),
+                                        ("hits", "Lookups answered from the cache since startup"),
+                                        ("misses", "Lookups the cache couldn't answer since startup"),
+                                        ("evictions", "Entries pushed out by the size bound since startup"))
+        } if meter else {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def report(self):
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            for field, gauge in self._gauges.items():
+                gauge.set(stats[field], {"cache": name})
+            logger.info(f"Cache {name}: {stats}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
@@ -1,4 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+
+DISPATCH_MODES = ("child", "inline")
 
 @dataclass
 class Ticket:
@@ -6,3 +9,54 @@ class Ticket:
     customer_name: str
     issue: str
     priority: str
+
+    def ref(self) -> "TicketRef":
+        return TicketRef(self.ticket_id, self.priority)
+
+@dataclass
+class TicketRef:
+    """What workflows hand to activities; the rest of the ticket lives in the ticket store"""
+    ticket_id: str
+    priority: str
+
+@dataclass
+class WorkflowOptions:
+    """Per-run switches passed from the client through the parent workflow to the priority workflow"""
+    local_activities: bool = True
+    # Low priority: start reserving an agent this many seconds into the KB search instead of waiting for it to miss
+    hedge_agent_after: Optional[float] = None
+    # "child" runs each priority as its own workflow; "inline" runs the same steps inside SupportTicketSystem
+    dispatch: str = "child"
+    # Tighten start-to-close timeouts to what the workers have actually observed (see activity_latency.py)
+    adaptive_timeouts: bool = False
+    # Seconds per activity type, filled in by the parent workflow when adaptive_timeouts is on
+    activity_timeouts: Optional[Dict[str, float]] = None
+    # Upsert status, priority, assigned agent and escalation count as search attributes (see search_attributes.py)
+    search_attributes: bool = False
+
+    def __post_init__(self):
+        if self.dispatch not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {self.dispatch} (expected one of {', '.join(DISPATCH_MODES)})")
+
+class TimelineEvent(NamedTuple):
+    """One timeline entry; travels as a JSON array rather than an object with the keys repeated per event"""
+    seq: int
+    timestamp: str
+    event: str
+    details: str
+    status: str
+
+@dataclass
+class TimelinePage:
+    """Timeline events after a cursor; pass `cursor` back on the next poll to get only what's new"""
+    events: List[TimelineEvent]
+    cursor: int
+    has_more: bool = False
+    # Set when the caller fell behind the retained window: how many events after its cursor were trimmed unseen, and
+    # counts by event name of every event trimmed so far (the timeline keeps no finer breakdown than that)
+    missed: int = 0
+    trimmed_by_event: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # JSON hands the events back as plain lists
+        self.events = [TimelineEvent(*event) for event in self.events]
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from profiles import active_profile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingMessage:
+    message: str
+    future: asyncio.Future
+
+
+class NotificationBatcher:
+    """Coalesces notifications per recipient into digests.
+
+    Messages for the same (channel, recipient) that arrive within `window` seconds -- or until `max_batch` pile up --
+    are sent as one digest, and every sender gets its own delivery result back.
+    """
+    def __init__(self, window: float = 0.5, max_batch: int = 50):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, str], List[_PendingMessage]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        self.digests_sent = 0
+        self.messages_sent = 0
+
+    async def send(self, channel: str, recipient: str, message: str) -> str:
+        loop = asyncio.get_running_loop()
+        key = (channel, recipient)
+        pending = _PendingMessage(message, loop.create_future())
+        batch = self._pending.setdefault(key, [])
+        batch.append(pending)
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await pending.future
+
+    def _flush(self, key: Tuple[str, str]):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._deliver(key, batch))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, key: Tuple[str, str], batch: List[_PendingMessage]):
+        channel, recipient = key
+        try:
+            await self._send_digest(channel, recipient, [p.message for p in batch])
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+        self.digests_sent += 1
+        self.messages_sent += len(batch)
+        for i, p in enumerate(batch, 1):
+            # A cancelled activity's message still went out; there's just nobody left to tell
+            if not p.future.done():
+                p.future.set_result(f"Delivered to {recipient} (message {i} of {len(batch)} in digest)")
+
+    async def _send_digest(self, channel: str, recipient: str, messages: List[str]):
+        logger.info(f"Sending {channel} digest of {len(messages)} message(s) to {recipient}")
+        # One send per digest, however many messages it carries
+        await active_profile().simulate(channel)
+
+
+_batcher: Optional[NotificationBatcher] = None
+_settings = {}
+
+
+def configure_notifications(**settings):
+    global _batcher, _settings
+    _settings = settings
+    _batcher = None
+
+
+def get_notification_batcher() -> NotificationBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = NotificationBatcher(**_settings)
+    return _batcher
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import math
+import random
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+@dataclass
+class ActivityProfile:
+    latency: float = 0.0          # seconds; the mean for exponential/lognormal, the midpoint for uniform
+    distribution: str = "fixed"
+    spread: float = 0.0           # +/- seconds for uniform, sigma for lognormal
+    failure_rate: float = 0.0     # chance the activity takes its failure path
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+
+@dataclass
+class LatencyProfile:
+    """Simulated latency and failure behaviour for every activity, with its own seeded RNG"""
+    name: str
+    activities: Dict[str, ActivityProfile]
+    seed: Optional[int] = None
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def __post_init__(self):
+        self.rng.seed(self.seed)
+
+    def _get(self, activity_name: str) -> ActivityProfile:
+        return self.activities.get(activity_name) or DEFAULT_PROFILE.activities[activity_name]
+
+    def delay(self, activity_name: str) -> float:
+        p = self._get(activity_name)
+        if p.latency <= 0:
+            return 0.0
+        if p.distribution == "uniform":
+            return max(0.0, self.rng.uniform(p.latency - p.spread, p.latency + p.spread))
+        if p.distribution == "exponential":
+            return self.rng.expovariate(1 / p.latency)
+        if p.distribution == "lognormal":
+            # mu chosen so the distribution's mean is p.latency
+            return self.rng.lognormvariate(math.log(p.latency) - p.spread ** 2 / 2, p.spread)
+        return p.latency
+
+    def fails(self, activity_name: str) -> bool:
+        return self.rng.random() < self._get(activity_name).failure_rate
+
+    async def simulate(self, activity_name: str):
+        delay = self.delay(activity_name)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# The original hard-coded sleeps and failure thresholds
+DEFAULT_PROFILE = LatencyProfile("default", {
+    "send_auto_response": ActivityProfile(latency=7),
+    # Backed by a real index now (see knowledge_base.py), so there's nothing to simulate by default
+    "search_knowledge_base": ActivityProfile(),
+    "assign_agent": ActivityProfile(latency=7),
+    "agent_investigate": ActivityProfile(latency=7, failure_rate=0.3),
+    "agent_resolve": ActivityProfile(latency=7, failure_rate=0.2),
+    "escalate_to_engineering": ActivityProfile(latency=30, failure_rate=0.2),
+    "apply_urgent_fix": ActivityProfile(latency=7, failure_rate=0.1),
+    "notify_customer": ActivityProfile(latency=3),
+    "notify_management": ActivityProfile(latency=4),
+    "validate_resolution": ActivityProfile(latency=5, failure_rate=0.3),
+    "release_agent": ActivityProfile(latency=3),
+})
+
+
+def _derive(**changes) -> Dict[str, ActivityProfile]:
+    return {k: replace(v, **changes) for k, v in DEFAULT_PROFILE.activities.items()}
+
+
+# Same branch mix as the default, but no waiting -- for pushing throughput through a test cluster
+ZERO_LATENCY_PROFILE = LatencyProfile("zero-latency", _derive(latency=0.0))
+
+# Default means with a long right tail, for soak tests
+PRODUCTION_LIKE_PROFILE = LatencyProfile("production-like", _derive(distribution="lognormal", spread=0.5))
+
+PROFILES = {p.name: p for p in (DEFAULT_PROFILE, ZERO_LATENCY_PROFILE, PRODUCTION_LIKE_PROFILE)}
+
+_active_profile = DEFAULT_PROFILE
+
+
+def load_profile(name_or_path: str, seed: Optional[int] = None) -> LatencyProfile:
+    """Load a built-in profile by name, or a JSON profile file.
+
+    A file looks like {"name": ..., "seed": ..., "activities": {"send_auto_response": {"latency": 0.5, ...}}}.
+    Activities it doesn't mention keep their default behaviour.
+    """
+    if name_or_path in PROFILES:
+        base = PROFILES[name_or_path]
+        profile = LatencyProfile(base.name, dict(base.activities), seed)
+    else:
+        with open(name_or_path) as f:
+            data = json.load(f)
+        activities = dict(DEFAULT_PROFILE.activities)
+        for activity_name, values in data.get("activities", {}).items():
+            if activity_name not in activities:
+                raise ValueError(f"Unknown activity in profile {name_or_path}: {activity_name}")
+            activities[activity_name] = ActivityProfile(**values)
+        profile = LatencyProfile(data.get("name", name_or_path), activities,
+                                 seed if seed is not None else data.get("seed"))
+    return profile
+
+
+def set_active_profile(profile: LatencyProfile):
+    global _active_profile
+    _active_profile = profile
+
+
+def active_profile() -> LatencyProfile:
+    return _active_profile
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from temporalio.client import WorkflowHandle
+
+from models import Ticket
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class TicketResult:
+    ticket_id: str
+    priority: str
+    outcome: str
+    result: str
+    latency: float
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def outcome_of(result: str) -> str:
+    # Workflow results look like "Resolved by agent: TEMP-001" -- group on the part before the ticket id
+    return result.split(":", 1)[0].strip()
+
+
+class LatencyCollector:
+    """Awaits submitted workflows and records submit-to-completion latency per ticket"""
+    def __init__(self, concurrency: int = 500):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks = []
+        self.results: List[TicketResult] = []
+        self.errors = 0
+
+    def track(self, handle: WorkflowHandle, ticket: Ticket, submitted_at: float):
+        self._tasks.append(asyncio.create_task(self._await_result(handle, ticket, submitted_at)))
+
+    async def _await_result(self, handle: WorkflowHandle, ticket: Ticket, submitted_at: float):
+        async with self._semaphore:
+            try:
+                result = await handle.result()
+                # Prefer the server's close time -- results may be picked up late when many are pending
+                description = await handle.describe()
+                closed_at = description.close_time.timestamp() if description.close_time else time.time()
+            except Exception as e:
+                self.errors += 1
+                result = f"Error: {type(e).__name__}"
+                closed_at = time.time()
+        self.results.append(TicketResult(
+            ticket_id=ticket.ticket_id,
+            priority=ticket.priority,
+            outcome=outcome_of(str(result)),
+            result=str(result),
+            latency=max(0.0, closed_at - submitted_at),
+        ))
+
+    async def wait(self):
+        await asyncio.gather(*self._tasks)
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    summary = {"count": len(values)}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = round(percentile(values, pct), 3)
+    summary["max"] = round(values[-1], 3) if values else 0.0
+    return summary
+
+
+def build_report(results: List[TicketResult]) -> dict:
+    by_priority = defaultdict(list)
+    by_outcome = defaultdict(list)
+    for r in results:
+        by_priority[r.priority].append(r.latency)
+        by_outcome[f"{r.priority} | {r.outcome}"].append(r.latency)
+    return {
+        "overall": summarize([r.latency for r in results]),
+        "by_priority": {k: summarize(v) for k, v in sorted(by_priority.items())},
+        "by_outcome": {k: summarize(v) for k, v in sorted(by_outcome.items())},
+    }
+
+
+def print_report(report: dict):
+    header = f"{'group':<55} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+    print("\nSubmit-to-completion latency (seconds)")
+    print(header)
+    print("-" * len(header))
+
+    def row(name: str, s: dict):
+        print(f"{name:<55} {s['count']:>6} {s['p50']:>8.2f} {s['p90']:>8.2f} {s['p99']:>8.2f} {s['max']:>8.2f}")
+
+    row("all tickets", report["overall"])
+    for name, s in report["by_priority"].items():
+        row(name, s)
+    for name, s in report["by_outcome"].items():
+        row(name, s)
+
+
+def write_report(path: str, report: dict, results: Optional[List[TicketResult]] = None):
+    payload = dict(report)
+    if results is not None:
+        payload["tickets"] = [asdict(r) for r in sorted(results, key=lambda r: r.ticket_id)]
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
@@ -1,59 +1,259 @@
+import argparse
 import asyncio
 import uuid
 import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple
 
-from temporalio.client import Client
+from temporalio.client import Client, WorkflowHandle
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError, RPCStatusCode
+
+from codec import add_converter_arguments, data_converter_from_args
 from workflow import SupportTicketSystem
-from models import Ticket
+from models import DISPATCH_MODES, Ticket, WorkflowOptions
+from ingest import IngestStats, stream_tickets
+from results import LatencyCollector, build_report, print_report, write_report
 
-async def main():
-    tickets = [
-        Ticket("TEMP-001", "Alice Smith", "Can't login to account", "low"),
-        Ticket("TEMP-002", "Bob Jones", "Payment processing stuck", "medium"),
-        Ticket("TEMP-003", "Carol Williams", "Database corruption detected!", "high"),
-        Ticket("TEMP-004", "Dave Brown", "API rate limits hit", "medium"),
-        Ticket("TEMP-005", "Eve Davis", "SECURITY BREACH - immediate action needed", "high"),
-        Ticket("TEMP-006", "Frank Miller", "Out of ideas", "low"),
-        Ticket("TEMP-007", "Spongebob Squarepants", "Job stinks", "high"),
-        Ticket("TEMP-008", "Patrick Star", "Adulting is hard", "low"),
-        Ticket("TEMP-009", "Mr Krab", "Calculator broke", "low"),
-        Ticket("TEMP-010", "Kevin Flynn", "Pet project went rogue", "high"),
-        Ticket("TEMP-011", "Edward Dillinger", "Email notifications not working", "low"),
-        Ticket("TEMP-012", "Quorra", "Matrix syndrome", "low"),
-        Ticket("TEMP-013", "Wendy Carlos", "Ahead of her time", "high"),
-        Ticket("TEMP-014", "Trent Reznor", "Excessive talent", "medium"),
-        Ticket("TEMP-015", "Atticus Ross", "Misunderstood in his time", "low"),
-        Ticket("TEMP-016", "Jordan Holmes", "Can't stop screaming", "low"),
-        Ticket("TEMP-017", "Dan Friesen", "The mysterious professor won't disclose identity", "medium"),
-        Ticket("TEMP-018", "Robert Evans", "There are bad people out there", "high"),
-        Ticket("TEMP-019", "Jamie Loftus", "Hot dog is a sandwich and someone disagrees", "medium"),
-        Ticket("TEMP-020", "Adam Driver", "Still too emo", "low"),
-        Ticket("TEMP-021", "Max Rocketansky", "People can't get enough Type O", "high"),
-        Ticket("TEMP-022", "Imperator Furiosa", "Boss too demanding", "medium"),
-        Ticket("TEMP-023", "Wow Platinum", "It's right there in the name", "low"),
-        Ticket("TEMP-024", "Vito Corleone", "Oranges aren't right", "high"),
-        Ticket("TEMP-025", "Vincent Vega", "Incorrect shoe type for twist contest", "low"),
-        Ticket("TEMP-026", "Mia Wallace", "Director won't give me socks", "medium"),
-        Ticket("TEMP-027", "Waylon Smithers", "Boss too demanding", "high"),
-        Ticket("TEMP-028", "Montgomery Burns", "Employees lazy and ungrateful", "low"),
-        Ticket("TEMP-029", "Michael Albertson", "Nobody knows my name", "medium"),
-        Ticket("TEMP-030", "Maggie Simpson", "I have a lot to say", "low"),
-    ]
-
-    client = await Client.connect("localhost:7233")
-
-    handles = []
+DEMO_TICKETS = [
+    Ticket("TEMP-001", "Alice Smith", "Can't login to account", "low"),
+    Ticket("TEMP-002", "Bob Jones", "Payment processing stuck", "medium"),
+    Ticket("TEMP-003", "Carol Williams", "Database corruption detected!", "high"),
+    Ticket("TEMP-004", "Dave Brown", "API rate limits hit", "medium"),
+    Ticket("TEMP-005", "Eve Davis", "SECURITY BREACH - immediate action needed", "high"),
+    Ticket("TEMP-006", "Frank Miller", "Out of ideas", "low"),
+    Ticket("TEMP-007", "Spongebob Squarepants", "Job stinks", "high"),
+    Ticket("TEMP-008", "Patrick Star", "Adulting is hard", "low"),
+    Ticket("TEMP-009", "Mr Krab", "Calculator broke", "low"),
+    Ticket("TEMP-010", "Kevin Flynn", "Pet project went rogue", "high"),
+    Ticket("TEMP-011", "Edward Dillinger", "Email notifications not working", "low"),
+    Ticket("TEMP-012", "Quorra", "Matrix syndrome", "low"),
+    Ticket("TEMP-013", "Wendy Carlos", "Ahead of her time", "high"),
+    Ticket("TEMP-014", "Trent Reznor", "Excessive talent", "medium"),
+    Ticket("TEMP-015", "Atticus Ross", "Misunderstood in his time", "low"),
+    Ticket("TEMP-016", "Jordan Holmes", "Can't stop screaming", "low"),
+    Ticket("TEMP-017", "Dan Friesen", "The mysterious professor won't disclose identity", "medium"),
+    Ticket("TEMP-018", "Robert Evans", "There are bad people out there", "high"),
+    Ticket("TEMP-019", "Jamie Loftus", "Hot dog is a sandwich and someone disagrees", "medium"),
+    Ticket("TEMP-020", "Adam Driver", "Still too emo", "low"),
+    Ticket("TEMP-021", "Max Rocketansky", "People can't get enough Type O", "high"),
+    Ticket("TEMP-022", "Imperator Furiosa", "Boss too demanding", "medium"),
+    Ticket("TEMP-023", "Wow Platinum", "It's right there in the name", "low"),
+    Ticket("TEMP-024", "Vito Corleone", "Oranges aren't right", "high"),
+    Ticket("TEMP-025", "Vincent Vega", "Incorrect shoe type for twist contest", "low"),
+    Ticket("TEMP-026", "Mia Wallace", "Director won't give me socks", "medium"),
+    Ticket("TEMP-027", "Waylon Smithers", "Boss too demanding", "high"),
+    Ticket("TEMP-028", "Montgomery Burns", "Employees lazy and ungrateful", "low"),
+    Ticket("TEMP-029", "Michael Albertson", "Nobody knows my name", "medium"),
+    Ticket("TEMP-030", "Maggie Simpson", "I have a lot to say", "low"),
+]
+
+# Start failures worth retrying -- the server was busy or briefly unreachable
+TRANSIENT_STATUS_CODES = {
+    RPCStatusCode.UNAVAILABLE,
+    RPCStatusCode.DEADLINE_EXCEEDED,
+    RPCStatusCode.RESOURCE_EXHAUSTED,
+    RPCStatusCode.ABORTED,
+}
+
+
+@dataclass
+class SubmitSummary:
+    submitted: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.submitted / self.elapsed if self.elapsed else 0.0
+
+
+class RateLimiter:
+    """Spaces out acquisitions so no more than `rate` happen per second"""
+    def __init__(self, rate: Optional[float]):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def workflow_id_for(ticket: Ticket) -> str:
+    return f"ticket-{ticket.priority}-{ticket.ticket_id}-{uuid.uuid4()}"
+
+
+def ticket_from_workflow_id(workflow_id: str) -> Optional[Tuple[str, str]]:
+    """(priority, ticket_id) back out of an ID made by workflow_id_for, or None for any other ID"""
+    prefix, _, rest = workflow_id.partition("-")
+    priority, _, rest = rest.partition("-")
+    # The ticket ID may contain dashes itself; the UUID on the end is always 36 characters
+    ticket_id = rest[:-37]
+    if prefix != "ticket" or not ticket_id or rest[-37] != "-":
+        return None
+    return priority, ticket_id
+
+
+async def start_ticket(
+    client: Client,
+    ticket: Ticket,
+    retries: int,
+    summary: SubmitSummary,
+    options: Optional[WorkflowOptions] = None,
+) -> WorkflowHandle:
+    # The id is fixed across attempts, so a start that landed before a timeout is picked up rather than duplicated
+    workflow_id = workflow_id_for(ticket)
+    attempt = 0
+    while True:
+        try:
+            return await client.start_workflow(
+                SupportTicketSystem.run,
+                args=[ticket, options] if options else [ticket],
+                id=workflow_id,
+                task_queue="workflows",
+            )
+        except WorkflowAlreadyStartedError:
+            return client.get_workflow_handle(workflow_id)
+        except RPCError as e:
+            if e.status not in TRANSIENT_STATUS_CODES or attempt >= retries:
+                raise
+            attempt += 1
+            summary.retries += 1
+            await asyncio.sleep(min(0.1 * 2 ** attempt, 5.0))
+
+
+async def submit_tickets(
+    client: Client,
+    tickets: Iterable[Ticket],
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    retries: int = 3,
+    quiet: bool = False,
+    on_started: Optional[Callable[[WorkflowHandle, Ticket, float], None]] = None,
+    options: Optional[WorkflowOptions] = None,
+) -> SubmitSummary:
+    """Start a workflow per ticket with at most `concurrency` starts in flight.
+
+    Tickets are pulled from the iterable only as slots free up, so a streaming source is never materialized.
+    """
+    summary = SubmitSummary()
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def submit(i: int, ticket: Ticket):
+        try:
+            await limiter.acquire()
+            handle = await start_ticket(client, ticket, retries, summary, options)
+            summary.submitted += 1
+            if on_started:
+                on_started(handle, ticket, time.time())
+            if not quiet:
+                print(f"🚀 Started workflow {i}: {ticket.ticket_id} ({ticket.priority.upper()})")
+        except Exception as e:
+            summary.failed += 1
+            print(f"❌ Could not start workflow for {ticket.ticket_id}: {e}")
+        finally:
+            semaphore.release()
+
+    started = time.monotonic()
     for i, ticket in enumerate(tickets, 1):
-        workflow_id = f"ticket-{ticket.priority}-{ticket.ticket_id}-{uuid.uuid4()}"
-        handle = await client.start_workflow(
-            SupportTicketSystem.run,
-            ticket,
-            id=workflow_id,
-            task_queue="workflows",
-        )
-        handles.append((handle, ticket, time.time()))
-        print(f"🚀 Started workflow {i}/{len(tickets)}: {ticket.ticket_id} ({ticket.priority.upper()})")
+        await semaphore.acquire()
+        task = asyncio.create_task(submit(i, ticket))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    summary.elapsed = time.monotonic() - started
+    return summary
+
+
+def print_submit_summary(summary: SubmitSummary):
+    print(f"\nSubmitted {summary.submitted} tickets in {summary.elapsed:.2f}s "
+          f"({summary.per_second:.1f} tickets/sec) | failed: {summary.failed} | retries: {summary.retries}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run support tickets through the Temporal workflow")
+    parser.add_argument("--input", metavar="PATH",
+                        help="Stream tickets from a JSONL or CSV file ('-' for stdin) instead of the demo list")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="Input format (default: detected from the file extension, jsonl for stdin)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Maximum workflow starts in flight (default: 1, one at a time)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Maximum tickets submitted per second (default: unlimited)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries per ticket on transient start failures")
+    parser.add_argument("--quiet", action="store_true", help="Only print the submission summary")
+    parser.add_argument("--no-local-activities", action="store_true",
+                        help="Run every activity on its task queue instead of running cheap steps as local activities")
+    parser.add_argument("--hedge-agent-after", type=float, metavar="SECONDS",
+                        help="Low priority: start reserving an agent this long into the knowledge base search (default: off)")
+    parser.add_argument("--dispatch", choices=DISPATCH_MODES, default="child",
+                        help="Run each priority as a child workflow (isolated) or inline in the parent (fewer workflows)")
+    parser.add_argument("--adaptive-timeouts", action="store_true",
+                        help="Derive activity timeouts from the latency percentiles the workers have recorded "
+                             "(start them with --latency-db)")
+    parser.add_argument("--search-attributes", action="store_true",
+                        help="Upsert ticket state as search attributes for ticket_board.py (register them first)")
+    parser.add_argument("--wait", action="store_true",
+                        help="Wait for every workflow to finish and report submit-to-completion latency")
+    parser.add_argument("--results-json", metavar="PATH",
+                        help="Also write the latency report and per-ticket results as JSON (implies --wait)")
+    parser.add_argument("--result-concurrency", type=int, default=500,
+                        help="Maximum workflow results awaited at once")
+    add_converter_arguments(parser)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    client = await Client.connect("localhost:7233", data_converter=data_converter_from_args(args))
+
+    ingest_stats = IngestStats()
+    tickets = stream_tickets(args.input, args.format, ingest_stats) if args.input else DEMO_TICKETS
+
+    collector = LatencyCollector(args.result_concurrency) if args.wait or args.results_json else None
+
+    summary = await submit_tickets(
+        client,
+        tickets,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        retries=args.retries,
+        quiet=args.quiet,
+        on_started=collector.track if collector else None,
+        options=WorkflowOptions(
+            local_activities=not args.no_local_activities,
+            hedge_agent_after=args.hedge_agent_after,
+            dispatch=args.dispatch,
+            adaptive_timeouts=args.adaptive_timeouts,
+            search_attributes=args.search_attributes,
+        ),
+    )
+    print_submit_summary(summary)
+    if args.input:
+        print(f"Read {ingest_stats.read} records from {args.input} | malformed (skipped): {ingest_stats.malformed}")
+
+    if collector:
+        await collector.wait()
+        report = build_report(collector.results)
+        print_report(report)
+        if collector.errors:
+            print(f"\n{collector.errors} workflows did not complete successfully")
+        if args.results_json:
+            write_report(args.results_json, report, collector.results)
+            print(f"Results written to {args.results_json}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
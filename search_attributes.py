@@ -0,0 +1,23 @@
+from temporalio.common import SearchAttributeKey
+
+# Custom search attributes have to exist on the namespace before a workflow upserts them (ticket_board.py register)
+TICKET_STATUS = SearchAttributeKey.for_keyword("TicketStatus")
+TICKET_PRIORITY = SearchAttributeKey.for_keyword("TicketPriority")
+ASSIGNED_AGENT = SearchAttributeKey.for_keyword("AssignedAgent")
+ESCALATION_COUNT = SearchAttributeKey.for_int("EscalationCount")
+
+TICKET_SEARCH_ATTRIBUTES = (TICKET_STATUS, TICKET_PRIORITY, ASSIGNED_AGENT, ESCALATION_COUNT)
+
+# The lifecycle states the workflows move through -- the only values TicketStatus takes
+TICKET_STATUSES = frozenset({
+    # SupportTicketSystem
+    "triaging", "processing_medium_priority", "processing_high_priority", "completed", "failed",
+    # LowPriorityWorkflow
+    "searching_knowledge_base", "assigning_to_agent", "agent_resolving",
+    # MediumPriorityWorkflow
+    "assigning_agent", "investigating", "escalating_to_engineering", "reassigning_to_agent", "agent_final_attempt",
+    # HighPriorityWorkflow
+    "applying_urgent_fix", "notifying_stakeholders",
+    # Shared
+    "notifying_customer", "resolved", "agent_unavailable",
+})
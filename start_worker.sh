@@ -1,3 +1,3 @@
 #!/bin/bash
 source venv/bin/activate
-python worker.py
\ No newline at end of file
+python worker.py "$@"
\ No newline at end of file
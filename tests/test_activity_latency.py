@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from temporalio.testing import ActivityEnvironment
+
+from activities import suggest_timeouts
+from activity_latency import LatencyRecorder, configure_latency_recorder, get_latency_recorder
+
+
+@pytest.fixture(autouse=True)
+def recording_off():
+    configure_latency_recorder(None)
+    yield
+    configure_latency_recorder(None)
+
+
+def suggest(headroom, floor):
+    return asyncio.run(ActivityEnvironment().run(suggest_timeouts, headroom, floor))
+
+
+def test_recording_is_off_unless_configured():
+    assert get_latency_recorder() is None
+    # Nothing recorded: every activity keeps its static timeout
+    assert suggest(3.0, 1.0) == {}
+
+
+def test_timeouts_follow_the_published_p99(tmp_path):
+    path = str(tmp_path / "latency.db")
+    recorder = LatencyRecorder(path)
+    for i in range(100):
+        recorder.record("agent_resolve", 0.5 + i / 100)
+        recorder.record("send_auto_response", 0.01)
+    recorder.record("validate_resolution", 5.0)     # too few samples to trust
+    recorder.publish()
+
+    configure_latency_recorder(path)
+    timeouts = suggest(3.0, 1.0)
+    assert set(timeouts) == {"agent_resolve", "send_auto_response"}
+    assert timeouts["agent_resolve"] == round(recorder.p99()["agent_resolve"] * 3.0, 3)
+    assert timeouts["send_auto_response"] == 1.0
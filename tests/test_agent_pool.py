@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from contextlib import closing
+
+import pytest
+
+from agent_pool import AgentPool
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "agents.db")
+
+
+def active_by_agent(pool):
+    # A connection of its own: the pool's is in use by other threads
+    with closing(sqlite3.connect(pool.path)) as conn:
+        return dict(conn.execute("SELECT name, active FROM agents"))
+
+
+def age_assignment(pool, ticket_id, seconds):
+    with closing(sqlite3.connect(pool.path)) as conn, conn:
+        conn.execute("UPDATE assignments SET assigned_at = assigned_at - ? WHERE ticket_id = ?", (seconds, ticket_id))
+
+
+def test_reserve_picks_least_loaded_agent(db):
+    pool = AgentPool(db, roster=[("regular", 3, 2), ("senior", 1, 1)])
+    picked = [pool.reserve(f"T{i}", "regular") for i in range(6)]
+    # Each agent takes a second ticket only once every agent has one
+    assert sorted(picked[:3]) == ["Agent-101", "Agent-102", "Agent-103"]
+    assert sorted(picked[3:]) == ["Agent-101", "Agent-102", "Agent-103"]
+    assert pool.reserve("T6", "regular") is None
+    assert pool.reserve("T7", "senior") == "Agent-104"
+    assert pool.utilization() == {"regular": (6, 6), "senior": (1, 1)}
+
+
+def test_reserve_is_idempotent_per_ticket(db):
+    pool = AgentPool(db, roster=[("regular", 2, 1)])
+    agent = pool.reserve("T1", "regular")
+    assert pool.reserve("T1", "regular") == agent
+    assert pool.utilization() == {"regular": (1, 2)}
+
+
+def test_release_is_idempotent(db):
+    pool = AgentPool(db, roster=[("regular", 1, 1)])
+    agent = pool.reserve("T1", "regular")
+    assert pool.release("T1", agent) is True
+    assert pool.release("T1", agent) is False
+    assert pool.utilization() == {"regular": (0, 1)}
+    assert pool.reserve("T2", "regular") == agent
+
+
+def test_release_in_another_process_is_seen(db):
+    first = AgentPool(db, roster=[("regular", 1, 1)])
+    second = AgentPool(db)
+    agent = first.reserve("T1", "regular")
+    assert second.reserve("T2", "regular") is None
+    assert second.release("T1", agent) is True
+    # `first` still has the agent as full in its heap; it resyncs before giving up
+    assert first.reserve("T3", "regular") == agent
+
+
+def test_concurrent_reservations_never_exceed_capacity(db):
+    AgentPool(db, roster=[("regular", 4, 2)])
+    pools = [AgentPool(db) for _ in range(4)]    # one connection each, like separate worker processes
+    reserved = []
+    lock = threading.Lock()
+
+    def work(pool, worker):
+        for i in range(25):
+            ticket = f"W{worker}-T{i}"
+            agent = pool.reserve(ticket, "regular")
+            if agent is None:
+                continue
+            with lock:
+                reserved.append((ticket, agent))
+            assert all(active <= 2 for active in active_by_agent(pool).values())
+            if i % 2:
+                # Release twice, from different pools: only the first one counts
+                assert pool.release(ticket, agent) is True
+                assert pools[(worker + 1) % len(pools)].release(ticket, agent) is False
+                with lock:
+                    reserved.remove((ticket, agent))
+
+    threads = [threading.Thread(target=work, args=(pool, n)) for n, pool in enumerate(pools)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(reserved) == 8    # every slot ends up held by one of the unreleased tickets
+    held = active_by_agent(pools[0])
+    assert all(active == 2 for active in held.values())
+    assert pools[0]._conn.execute("SELECT COUNT(*) FROM assignments").fetchone()[0] == 8
+
+
+def test_reap_frees_stale_assignments(db):
+    pool = AgentPool(db, roster=[("regular", 1, 2)])
+    agent = pool.reserve("T1", "regular")
+    pool.reserve("T2", "regular")
+    assert pool.reap(max_age=60) == 0
+    age_assignment(pool, "T1", 120)
+    assert pool.reap(max_age=60) == 1
+    assert pool.utilization() == {"regular": (1, 2)}
+    assert pool.release("T1", agent) is False
+    assert pool.release("T2", agent) is True
+
+
+def test_full_pool_reaps_before_giving_up(db):
+    pool = AgentPool(db, roster=[("regular", 1, 1)], assignment_ttl=60)
+    agent = pool.reserve("T1", "regular")
+    assert pool.reserve("T2", "regular") is None
+    age_assignment(pool, "T1", 120)
+    assert pool.reserve("T2", "regular") == agent
+    assert pool.utilization() == {"regular": (1, 1)}
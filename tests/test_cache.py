@@ -0,0 +1,61 @@
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=300, clock=clock)
+    cache.set("miss", [], ttl=1)
+    cache.set("hit", ["article"])
+    clock.now += 2
+    assert cache.get("miss", "gone") == "gone"
+    assert cache.get("hit") == ["article"]
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_stats_count_hits_misses_and_evictions():
+    cache = TTLCache(maxsize=1, ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("b")
+    cache.get("a")
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
+
+
+def test_invalidate():
+    cache = TTLCache(maxsize=10, ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.invalidate()
+    assert len(cache) == 0
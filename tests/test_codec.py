@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from codec import (
+    ZLIB_ENCODING, CompressionCodec, build_data_converter, decode_ticket, decode_ticket_ref, encode_ticket,
+    encode_ticket_ref,
+)
+from models import Ticket, TicketRef
+
+
+@pytest.mark.parametrize("priority", ["low", "medium", "high", "urgent", ""])
+def test_ticket_round_trip(priority):
+    ticket = Ticket("TEMP-001", "Zoë Ñandú", "Can't log in: 🔒 \"quoted\"\nsecond line", priority)
+    assert decode_ticket(encode_ticket(ticket)) == ticket
+
+
+def test_ticket_ref_round_trip():
+    ref = TicketRef("TEMP-002", "high")
+    assert decode_ticket_ref(encode_ticket_ref(ref)) == ref
+
+
+def test_compact_form_is_smaller_than_json():
+    ticket = Ticket("TEMP-003", "Alice", "Password reset", "low")
+    json_payload = asyncio.run(build_data_converter("json").encode([ticket]))[0]
+    assert len(encode_ticket(ticket)) < len(json_payload.data)
+
+
+@pytest.mark.parametrize("encoding", ["json", "compact", "compressed"])
+def test_data_converter_round_trip(encoding):
+    converter = build_data_converter(encoding, threshold=64)
+    values = [Ticket("TEMP-004", "Bob", "Refund " * 50, "medium"), TicketRef("TEMP-004", "medium"), "plain"]
+
+    async def round_trip():
+        payloads = await converter.encode(values)
+        return await converter.decode(payloads, [Ticket, TicketRef, str])
+
+    assert asyncio.run(round_trip()) == values
+
+
+def test_codec_compresses_only_when_it_helps():
+    codec = CompressionCodec(threshold=64)
+    converter = build_data_converter("compact")
+    big, small = asyncio.run(converter.encode([Ticket("T", "C", "x" * 1000, "low"), TicketRef("T", "low")]))
+    encoded = asyncio.run(codec.encode([big, small]))
+    assert encoded[0].metadata["encoding"] == ZLIB_ENCODING
+    assert encoded[1] == small
+    assert asyncio.run(codec.decode(encoded)) == [big, small]
@@ -0,0 +1,57 @@
+import json
+
+from critical_path import WORKFLOW_OVERHEAD, critical_path, load_spans
+
+
+def workflow_span(workflow_id, started, completed, parent_id=None):
+    return {"kind": "workflow", "ticket_id": "TEMP-001", "priority": "high", "name": "SupportTicketSystem",
+            "workflow_id": workflow_id, "parent_id": parent_id, "scheduled": started, "started": started,
+            "completed": completed, "status": "ok"}
+
+
+def activity_span(workflow_id, name, scheduled, started, completed):
+    return {"kind": "activity", "ticket_id": "TEMP-001", "name": name, "workflow_id": workflow_id,
+            "scheduled": scheduled, "started": started, "completed": completed, "status": "ok"}
+
+
+def write_trace(path, spans):
+    path.write_text("".join(json.dumps(span) + "\n" for span in spans), encoding="utf-8")
+    return str(path)
+
+
+def test_reruns_of_a_ticket_id_stay_separate(tmp_path):
+    first, second = "ticket-high-TEMP-001-aaa", "ticket-high-TEMP-001-bbb"
+    path = write_trace(tmp_path / "traces.jsonl", [
+        # Two runs of TEMP-001, appended to the same file; both use the child ID high-TEMP-001
+        activity_span(first, "store_ticket", 0.0, 0.0, 0.1),
+        activity_span("high-TEMP-001", "apply_urgent_fix", 0.2, 0.3, 1.0),
+        workflow_span("high-TEMP-001", 0.15, 1.1, parent_id=first),
+        workflow_span(first, 0.0, 1.2),
+        activity_span(second, "store_ticket", 10.0, 10.0, 10.1),
+        activity_span("high-TEMP-001", "apply_urgent_fix", 10.2, 10.2, 12.0),
+        workflow_span("high-TEMP-001", 10.15, 12.1, parent_id=second),
+        workflow_span(second, 10.0, 12.2),
+    ])
+    runs = load_spans(path)
+    assert set(runs) == {first, second}
+    assert [s["completed"] for s in runs[first] if s["kind"] == "activity"] == [0.1, 1.0]
+    assert [s["completed"] for s in runs[second] if s["kind"] == "activity"] == [10.1, 12.0]
+
+    root, path = critical_path(runs[second])
+    assert root["workflow_id"] == second
+    steps = [(step, component) for step, component, _ in path]
+    assert steps == [("store_ticket", "queue"), ("store_ticket", "run"), (WORKFLOW_OVERHEAD, ""),
+                     ("apply_urgent_fix", "queue"), ("apply_urgent_fix", "run"), (WORKFLOW_OVERHEAD, "")]
+    assert round(sum(seconds for _, _, seconds in path), 6) == 2.2
+
+
+def test_spans_from_before_the_root_started_are_ignored():
+    root_id = "ticket-low-TEMP-001-ccc"
+    spans = [
+        activity_span(root_id, "send_auto_response", 0.0, 0.0, 5.0),      # an earlier, failed attempt of the run
+        workflow_span(root_id, 6.0, 7.0),
+        activity_span(root_id, "send_auto_response", 6.0, 6.1, 6.5),
+    ]
+    root, path = critical_path(spans)
+    assert [(step, round(seconds, 6)) for step, _, seconds in path] == [
+        ("send_auto_response", 0.1), ("send_auto_response", 0.4), (WORKFLOW_OVERHEAD, 0.5)]
@@ -0,0 +1,61 @@
+import json
+import logging
+
+from ingest import IngestStats, stream_tickets
+from models import Ticket
+
+
+def test_jsonl_skips_malformed_lines(tmp_path, caplog):
+    path = tmp_path / "tickets.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"ticket_id": "T1", "customer_name": "Alice", "issue": "Login", "priority": "LOW"}),
+        "{not json",
+        json.dumps({"ticket_id": "T2", "customer_name": "Bob", "issue": "Refund"}),
+        json.dumps({"ticket_id": "T3", "customer_name": "Carol", "issue": "Outage", "priority": "urgent"}),
+        json.dumps(["T4", "Dave", "Bug", "high"]),
+        "",
+        json.dumps({"ticket_id": "T5", "customer_name": " Eve ", "issue": "Outage", "priority": "high"}),
+    ]) + "\n", encoding="utf-8")
+    stats = IngestStats()
+    with caplog.at_level(logging.WARNING, logger="ingest"):
+        tickets = list(stream_tickets(str(path), stats=stats))
+    assert tickets == [Ticket("T1", "Alice", "Login", "low"), Ticket("T5", "Eve", "Outage", "high")]
+    assert stats == IngestStats(read=6, malformed=4)
+    assert [r.message.split(":")[0] for r in caplog.records] == [
+        f"Skipping malformed ticket on line {n} of {path}" for n in (2, 3, 4, 5)]
+
+
+def test_csv_skips_malformed_rows(tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_text(
+        "ticket_id,customer_name,issue,priority\n"
+        "T1,Alice,\"Login, again\",medium\n"
+        "T2,Bob,,low\n"
+        "T3,Carol,Outage,whenever\n"
+        "T4,Dave,Bug,High\n",
+        encoding="utf-8")
+    stats = IngestStats()
+    tickets = list(stream_tickets(str(path), stats=stats))
+    assert tickets == [Ticket("T1", "Alice", "Login, again", "medium"), Ticket("T4", "Dave", "Bug", "high")]
+    assert stats == IngestStats(read=4, malformed=2)
+
+
+def test_undecodable_lines_are_skipped_not_fatal(tmp_path):
+    path = tmp_path / "tickets.jsonl"
+    path.write_bytes(
+        b'{"ticket_id": "T1", "customer_name": "Al\xffce", "issue": "Login", "priority": "low"}\n'
+        b'{"ticket_id": "T2", "customer_name": "Bob", "issue": "Refund", "priority": "medium"}\n')
+    stats = IngestStats()
+    assert list(stream_tickets(str(path), stats=stats)) == [Ticket("T2", "Bob", "Refund", "medium")]
+    assert stats == IngestStats(read=2, malformed=1)
+
+
+def test_csv_record_with_an_undecodable_line_is_skipped(tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_bytes(
+        b"ticket_id,customer_name,issue,priority\n"
+        b"T1,Alice,\"spans\n\xfe lines\",low\n"
+        b"T2,Bob,\"also spans\nlines\",high\n")
+    stats = IngestStats()
+    assert list(stream_tickets(str(path), stats=stats)) == [Ticket("T2", "Bob", "also spans\nlines", "high")]
+    assert stats == IngestStats(read=2, malformed=1)
@@ -0,0 +1,31 @@
+import os
+
+from knowledge_base import CachedKnowledgeBase, KnowledgeBase
+
+
+def write_article(directory, name, text, mtime):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_changes_are_read_then_applied(tmp_path):
+    write_article(tmp_path, "password.md", "# Password reset\nReset your password from the login page.", 1000)
+    write_article(tmp_path, "refund.md", "# Refunds\nRefunds are issued to the original payment method.", 1000)
+    kb = CachedKnowledgeBase(KnowledgeBase(str(tmp_path), min_score=0))
+    assert [a for a, _ in kb.search("refund payment")] == ["refund"]
+
+    os.remove(tmp_path / "refund.md")
+    write_article(tmp_path, "invoice.md", "# Invoices\nDownload invoices and refund receipts from billing.", 1000)
+    write_article(tmp_path, "password.md", "# Password reset\nPasswords reset by email link now.", 2000)
+    changes = kb.read_changes()
+    # Reading alone leaves the index (and the cache in front of it) as it was
+    assert len(kb) == 2 and [a for a, _ in kb.search("refund payment")] == ["refund"]
+
+    assert kb.apply_changes(changes) == 3
+    assert sorted(kb.knowledge_base._articles) == ["invoice", "password"]
+    assert [a for a, _ in kb.search("email link password")] == ["password"]
+    assert [a for a, _ in kb.search("refund payment")] == ["invoice"]
+    # A second refresh that read the same changes has nothing left to do
+    assert kb.apply_changes(changes) == 0
+    assert kb.apply_changes(kb.read_changes()) == 0
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from temporalio.client import WorkflowExecutionStatus
+from temporalio.service import RPCError, RPCStatusCode
+
+from ticket_status import StatusCache, StatusFetcher
+
+PARENT = "ticket-high-TEMP-001-123e4567-e89b-12d3-a456-426614174000"
+OTHER_PARENT = "ticket-high-TEMP-001-00000000-0000-0000-0000-000000000000"
+
+
+class FakeHandle:
+    def __init__(self, workflow):
+        self.workflow = workflow
+
+    async def describe(self, rpc_timeout=None):
+        if self.workflow is None:
+            raise RPCError("not found", RPCStatusCode.NOT_FOUND, b"")
+        return SimpleNamespace(status=WorkflowExecutionStatus.COMPLETED, parent_id=self.workflow.get("parent_id"))
+
+    async def query(self, name, rpc_timeout=None):
+        return self.workflow["queries"][name]
+
+
+class FakeClient:
+    def __init__(self, workflows):
+        self.workflows = workflows
+
+    def get_workflow_handle(self, workflow_id):
+        return FakeHandle(self.workflows.get(workflow_id))
+
+
+def parent(**queries):
+    return {"queries": {"status": "completed", "assigned_agent": "Agent-121", "escalation_count": 0, **queries}}
+
+
+def child(parent_id, fix_attempted):
+    return {"parent_id": parent_id, "queries": {"status": "resolved", "assigned_agent": "Agent-121",
+                                                "escalation_count": 1, "fix_attempted": fix_attempted}}
+
+
+def test_child_of_this_parent_is_used_and_cached(tmp_path):
+    cache = StatusCache(str(tmp_path / "status.db"))
+    client = FakeClient({PARENT: parent(), "high-TEMP-001": child(PARENT, True)})
+    record = asyncio.run(StatusFetcher(client, cache).fetch(PARENT))
+    assert record["child"]["fix_attempted"] is True
+    assert record["child"]["escalation_count"] == 1
+    assert cache.get(PARENT) == record
+
+
+def test_child_of_another_parent_is_ignored_and_not_cached(tmp_path):
+    cache = StatusCache(str(tmp_path / "status.db"))
+    client = FakeClient({PARENT: parent(), "high-TEMP-001": child(OTHER_PARENT, True)})
+    record = asyncio.run(StatusFetcher(client, cache).fetch(PARENT))
+    assert record["child"] is None
+    assert record["child_owner"] == OTHER_PARENT
+    assert "fix_attempted" not in record
+    assert cache.get(PARENT) is None
+
+
+def test_inline_dispatch_reads_priority_queries_from_the_parent(tmp_path):
+    client = FakeClient({PARENT: parent(fix_attempted=True)})
+    record = asyncio.run(StatusFetcher(client, None).fetch(PARENT))
+    assert record["child"] is None
+    assert record["fix_attempted"] is True
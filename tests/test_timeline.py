@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+from temporalio import workflow as temporal_workflow
+
+import workflow
+from workflow import SupportTicketSystem, TIMELINE_CAP
+
+
+@pytest.fixture
+def system(monkeypatch):
+    # Outside a worker there's no workflow clock
+    monkeypatch.setattr(temporal_workflow, "now", lambda: datetime(2024, 1, 1, tzinfo=timezone.utc))
+    return SupportTicketSystem()
+
+
+def add_events(system, count, event="step"):
+    for _ in range(count):
+        system._add_timeline_event(event)
+
+
+def test_pages_follow_the_cursor(system):
+    add_events(system, 5)
+    page = system.timeline_since(0, limit=2)
+    assert [e.seq for e in page.events] == [1, 2]
+    assert (page.cursor, page.has_more, page.missed) == (2, True, 0)
+
+    page = system.timeline_since(page.cursor, limit=2)
+    assert [e.seq for e in page.events] == [3, 4]
+    page = system.timeline_since(page.cursor, limit=2)
+    assert [e.seq for e in page.events] == [5]
+    assert (page.cursor, page.has_more) == (5, False)
+
+    # Caught up: nothing new, and the cursor stays put until more events arrive
+    page = system.timeline_since(page.cursor)
+    assert (page.events, page.cursor, page.has_more) == ([], 5, False)
+    add_events(system, 1)
+    assert [e.seq for e in system.timeline_since(5).events] == [6]
+
+
+def test_empty_timeline(system):
+    page = system.timeline_since(0)
+    assert (page.events, page.cursor, page.has_more, page.missed) == ([], 0, False, 0)
+
+
+def test_cap_trims_oldest_and_summarizes_them(system):
+    add_events(system, 10, "early")
+    add_events(system, TIMELINE_CAP - 9, "late")
+    trimmed = TIMELINE_CAP // 10
+    assert len(system._timeline) == TIMELINE_CAP + 1 - trimmed
+    assert system._timeline[0].seq == trimmed + 1
+
+    # A caller that fell behind the retained window learns how many events it missed, with counts of everything
+    # trimmed (including the three it had already seen), then gets the oldest retained events
+    page = system.timeline_since(3, limit=workflow.TIMELINE_PAGE_SIZE)
+    assert page.missed == trimmed - 3
+    assert page.trimmed_by_event == {"early": 10, "late": trimmed - 10}
+    assert sum(page.trimmed_by_event.values()) == page.missed + 3
+    assert page.events[0].seq == trimmed + 1
+    assert page.cursor == trimmed + workflow.TIMELINE_PAGE_SIZE
+    assert page.has_more
+
+    # Inside the window, nothing is summarized
+    page = system.timeline_since(trimmed + 1)
+    assert (page.missed, page.trimmed_by_event) == (0, {})
+    assert page.events[0].seq == trimmed + 2
+
+
+def test_cursor_beyond_trimmed_events_after_everything_is_read(system):
+    add_events(system, TIMELINE_CAP + 1)
+    last = system._timeline_seq
+    page = system.timeline_since(last)
+    assert (page.events, page.cursor, page.has_more, page.missed) == ([], last, False, 0)
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+from collections import Counter
+from typing import List, Optional
+
+from temporalio.api.operatorservice.v1 import AddSearchAttributesRequest, ListSearchAttributesRequest
+from temporalio.client import Client, WorkflowExecution
+from temporalio.service import RPCError
+
+from search_attributes import (
+    ASSIGNED_AGENT, ESCALATION_COUNT, TICKET_PRIORITY, TICKET_SEARCH_ATTRIBUTES, TICKET_STATUS, TICKET_STATUSES,
+)
+
+PRIORITY_WORKFLOWS = ("LowPriorityWorkflow", "MediumPriorityWorkflow", "HighPriorityWorkflow")
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "\\'") + "'"
+
+
+def build_query(args: argparse.Namespace) -> str:
+    """Visibility query for the filters given; one row per ticket unless --children"""
+    if args.children:
+        # Under child dispatch the parent only says processing/completed/failed; the children have the detail
+        clauses = [f"WorkflowType IN ({', '.join(_quote(w) for w in PRIORITY_WORKFLOWS)})"]
+    else:
+        clauses = [f"WorkflowType = {_quote('SupportTicketSystem')}"]
+    if args.status:
+        clauses.append(f"{TICKET_STATUS.name} = {_quote(args.status)}")
+    if args.priority:
+        clauses.append(f"{TICKET_PRIORITY.name} = {_quote(args.priority)}")
+    if args.agent:
+        clauses.append(f"{ASSIGNED_AGENT.name} = {_quote(args.agent)}")
+    if args.min_escalations is not None:
+        clauses.append(f"{ESCALATION_COUNT.name} >= {args.min_escalations}")
+    if args.running:
+        clauses.append("ExecutionStatus = 'Running'")
+    if args.query:
+        clauses.append(f"({args.query})")
+    return " AND ".join(clauses)
+
+
+def ticket_row(execution: WorkflowExecution) -> dict:
+    attributes = execution.typed_search_attributes
+    return {
+        "workflow_id": execution.id,
+        "execution_status": execution.status.name if execution.status else None,
+        "status": attributes.get(TICKET_STATUS),
+        "priority": attributes.get(TICKET_PRIORITY),
+        "assigned_agent": attributes.get(ASSIGNED_AGENT),
+        "escalation_count": attributes.get(ESCALATION_COUNT),
+    }
+
+
+async def register(client: Client, namespace: str):
+    """Add the ticket search attributes to the namespace, skipping any that already exist"""
+    existing = await client.operator_service.list_search_attributes(ListSearchAttributesRequest(namespace=namespace))
+    missing = {key.name: key.indexed_value_type.value
+               for key in TICKET_SEARCH_ATTRIBUTES if key.name not in existing.custom_attributes}
+    if missing:
+        await client.operator_service.add_search_attributes(
+            AddSearchAttributesRequest(search_attributes=missing, namespace=namespace))
+    print(f"Registered: {', '.join(missing) or 'nothing (all present)'}")
+
+
+async def count_by_status(client: Client, query: str) -> Counter:
+    """Ticket counts per TicketStatus: one count call where the server can group by it, otherwise one paged list"""
+    try:
+        result = await client.count_workflows(f"{query} GROUP BY {TICKET_STATUS.name}")
+        return Counter({str(group.group_values[0]) if group.group_values else None: group.count
+                        for group in result.groups})
+    except RPCError:
+        # Older servers only group by ExecutionStatus
+        counts = Counter()
+        async for execution in client.list_workflows(query):
+            counts[execution.typed_search_attributes.get(TICKET_STATUS)] += 1
+        return counts
+
+
+async def list_tickets(client: Client, query: str, limit: Optional[int]) -> List[dict]:
+    return [ticket_row(execution) async for execution in client.list_workflows(query, limit=limit)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fleet-wide ticket views from workflow search attributes")
+    parser.add_argument("--address", default="localhost:7233", help="Temporal server address")
+    parser.add_argument("--namespace", default="default")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("register", help="Add the ticket search attributes to the namespace (once per server)")
+    for name, description in (("count", "Count tickets by status"), ("list", "List tickets with their state")):
+        command = commands.add_parser(name, help=description)
+        command.add_argument("--status", choices=sorted(TICKET_STATUSES), metavar="STATUS",
+                             help="Only tickets in this status")
+        command.add_argument("--priority", choices=["low", "medium", "high"])
+        command.add_argument("--agent", help="Only tickets assigned to this agent")
+        command.add_argument("--min-escalations", type=int, metavar="N", help="Only tickets escalated at least N times")
+        command.add_argument("--running", action="store_true", help="Only workflows that are still running")
+        command.add_argument("--children", action="store_true",
+                             help="Look at the low-/medium-/high- priority workflows instead of the parent workflows")
+        command.add_argument("--query", help="Extra visibility filter, ANDed with the rest")
+    commands.choices["list"].add_argument("--limit", type=int, default=100, help="Maximum rows (0 for all)")
+    commands.choices["list"].add_argument("--jsonl", action="store_true", help="One JSON object per line")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    client = await Client.connect(args.address, namespace=args.namespace)
+    if args.command == "register":
+        await register(client, args.namespace)
+        return
+
+    query = build_query(args)
+    if args.command == "count":
+        counts = await count_by_status(client, query)
+        for status, count in counts.most_common():
+            print(f"{status or '(none)':<40} {count:>8}")
+        print(f"{'total':<40} {sum(counts.values()):>8}")
+        return
+
+    rows = await list_tickets(client, query, args.limit or None)
+    for row in rows:
+        if args.jsonl:
+            print(json.dumps(row))
+        else:
+            print(f"{row['workflow_id']:<60} {row['status'] or '-':<28} {row['priority'] or '-':<7} "
+                  f"{row['assigned_agent'] or '-':<16} {row['escalation_count'] or 0:>3} {row['execution_status']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
+from temporalio.client import Client, WorkflowExecutionStatus
+from temporalio.service import RPCError, RPCStatusCode
+
+from codec import add_converter_arguments, data_converter_from_args
+from run_temporal import ticket_from_workflow_id
+
+DEFAULT_STATUS_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "status_cache.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticket_status (
+    workflow_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    cached_at REAL NOT NULL
+);
+"""
+
+PARENT_QUERIES = ("status", "assigned_agent", "escalation_count")
+CHILD_QUERIES = {
+    "low": ("status", "escalation_count"),
+    "medium": ("status", "assigned_agent", "escalation_count", "was_escalated"),
+    "high": ("status", "assigned_agent", "escalation_count", "fix_attempted"),
+}
+# Under inline dispatch there's no child; the parent answers these for the steps it ran itself
+INLINE_QUERIES = {
+    "low": (),
+    "medium": ("was_escalated",),
+    "high": ("fix_attempted",),
+}
+
+
+class StatusCache:
+    """Query results for tickets whose workflows have all closed; those answers can't change, so they never expire"""
+    def __init__(self, path: str = DEFAULT_STATUS_CACHE):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, workflow_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM ticket_status WHERE workflow_id = ?", (workflow_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, workflow_id: str, record: dict):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO ticket_status (workflow_id, record, cached_at) VALUES (?, ?, ?)",
+                               (workflow_id, json.dumps(record), time.time()))
+
+
+class _ForeignChild(Exception):
+    def __init__(self, parent_id: Optional[str]):
+        super().__init__(f"started by {parent_id}")
+        self.parent_id = parent_id
+
+
+class StatusFetcher:
+    """Queries a ticket's parent workflow and its low-/medium-/high- child, one RPC at a time per ticket"""
+    def __init__(self, client: Client, cache: Optional[StatusCache], rpc_timeout: float = 10.0):
+        self.client = client
+        self.cache = cache
+        self.rpc_timeout = timedelta(seconds=rpc_timeout)
+        self.stats = {"tickets": 0, "cached": 0, "errors": 0}
+
+    async def _query_workflow(self, workflow_id: str, queries, parent_id: Optional[str] = None) -> Optional[dict]:
+        """Execution status plus each query's answer, or None if there's no such workflow.
+
+        With `parent_id`, a workflow started by some other parent is treated as missing too: child IDs repeat
+        whenever a ticket ID does, so the latest run under that ID may belong to another ticket.
+        """
+        handle = self.client.get_workflow_handle(workflow_id)
+        try:
+            description = await handle.describe(rpc_timeout=self.rpc_timeout)
+        except RPCError as e:
+            if e.status == RPCStatusCode.NOT_FOUND:
+                return None
+            raise
+        if parent_id is not None and description.parent_id != parent_id:
+            raise _ForeignChild(description.parent_id)
+        record = {"workflow_id": workflow_id, "execution_status": description.status.name if description.status else None}
+        for query in queries:
+            record[query] = await handle.query(query, rpc_timeout=self.rpc_timeout)
+        return record
+
+    async def fetch(self, workflow_id: str) -> dict:
+        self.stats["tickets"] += 1
+        cached = self.cache.get(workflow_id) if self.cache else None
+        if cached is not None:
+            self.stats["cached"] += 1
+            return cached
+        try:
+            record = await self._query_workflow(workflow_id, PARENT_QUERIES)
+            if record is None:
+                raise LookupError("workflow not found")
+            child = None
+            complete = True
+            parsed = ticket_from_workflow_id(workflow_id)
+            if parsed:
+                priority, ticket_id = parsed
+                record.update(ticket_id=ticket_id, priority=priority)
+                try:
+                    # Missing under inline dispatch, or while the parent hasn't started it yet
+                    child = await self._query_workflow(
+                        f"{priority}-{ticket_id}", CHILD_QUERIES.get(priority, ("status",)), parent_id=workflow_id)
+                except _ForeignChild as e:
+                    # This ticket's child has been superseded by a later run of the same ticket ID
+                    record["child_owner"] = e.parent_id
+                    complete = False
+                if child is None and complete:
+                    handle = self.client.get_workflow_handle(workflow_id)
+                    for query in INLINE_QUERIES.get(priority, ()):
+                        record[query] = await handle.query(query, rpc_timeout=self.rpc_timeout)
+            record["child"] = child
+        except Exception as e:
+            self.stats["errors"] += 1
+            return {"workflow_id": workflow_id, "error": f"{type(e).__name__}: {e}"}
+
+        statuses = [r["execution_status"] for r in (record, child) if r]
+        if self.cache and complete and WorkflowExecutionStatus.RUNNING.name not in statuses:
+            self.cache.put(workflow_id, record)
+        return record
+
+
+async def workflow_ids(args, client: Client) -> AsyncIterator[str]:
+    """IDs from the command line, a file (or stdin), and/or a visibility query, in that order"""
+    for workflow_id in args.workflow_ids:
+        yield workflow_id
+    if args.ids:
+        f = sys.stdin if args.ids == "-" else open(args.ids, encoding="utf-8")
+        with f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+    if args.query is not None:
+        query = "WorkflowType = 'SupportTicketSystem'" + (f" AND ({args.query})" if args.query else "")
+        async for execution in client.list_workflows(query):
+            yield execution.id
+
+
+async def query_all(fetcher: StatusFetcher, ids: AsyncIterator[str], concurrency: int, out):
+    """Fetch every ticket with at most `concurrency` in flight, writing each record as soon as it's ready"""
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def fetch_one(workflow_id: str):
+        try:
+            out.write(json.dumps(await fetcher.fetch(workflow_id)) + "\n")
+        finally:
+            semaphore.release()
+
+    # Acquire before creating the task, so 10k IDs never means 10k tasks (or RPCs) at once
+    async for workflow_id in ids:
+        await semaphore.acquire()
+        task = asyncio.create_task(fetch_one(workflow_id))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    await asyncio.gather(*pending)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Live query data for many tickets, streamed as JSONL")
+    parser.add_argument("workflow_ids", nargs="*", metavar="WORKFLOW_ID", help="Parent (ticket-...) workflow IDs")
+    parser.add_argument("--ids", metavar="PATH", help="File of workflow IDs, one per line ('-' for stdin)")
+    parser.add_argument("--query", metavar="FILTER", nargs="?", const="",
+                        help="Also take every SupportTicketSystem workflow matching this visibility filter "
+                             "(no value: all of them)")
+    parser.add_argument("--address", default="localhost:7233", help="Temporal server address")
+    parser.add_argument("--concurrency", type=int, default=50, help="Tickets queried at once (one RPC each)")
+    parser.add_argument("--rpc-timeout", type=float, default=10.0, help="Seconds before a describe or query gives up")
+    parser.add_argument("--cache", default=DEFAULT_STATUS_CACHE, help="SQLite cache of closed tickets' results")
+    parser.add_argument("--no-cache", action="store_true", help="Query everything, even closed tickets already cached")
+    parser.add_argument("--output", metavar="PATH", help="Write JSONL here instead of stdout")
+    add_converter_arguments(parser)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    client = await Client.connect(args.address, data_converter=data_converter_from_args(args))
+    fetcher = StatusFetcher(client, None if args.no_cache else StatusCache(args.cache), args.rpc_timeout)
+    started = time.monotonic()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        await query_all(fetcher, workflow_ids(args, client), args.concurrency, out)
+    finally:
+        if args.output:
+            out.close()
+    stats = fetcher.stats
+    print(f"{stats['tickets']} tickets in {time.monotonic() - started:.1f}s | from cache: {stats['cached']} | "
+          f"errors: {stats['errors']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
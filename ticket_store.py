@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from cache import TTLCache
+from models import Ticket
+
+DEFAULT_TICKET_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tickets.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id TEXT PRIMARY KEY,
+    customer_name TEXT NOT NULL,
+    issue TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class TicketStore:
+    """Full tickets by ID in a SQLite file shared by the worker processes on a host.
+
+    Workflows only carry a TicketRef; activities that need the customer name or issue text read it from here, and each
+    process keeps recently used tickets in a read cache.
+    """
+    def __init__(self, path: str = DEFAULT_TICKET_DB, cache_size: int = 10_000, cache_ttl: float = 300.0):
+        self.path = path
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def put(self, ticket: Ticket):
+        """Insert or replace a ticket; safe to repeat when the storing activity is retried"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tickets (ticket_id, customer_name, issue, priority, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (ticket.ticket_id, ticket.customer_name, ticket.issue, ticket.priority, time.time()))
+        self.cache.set(ticket.ticket_id, ticket)
+
+    def get_cached(self, ticket_id: str) -> Optional[Ticket]:
+        """Cache-only lookup, cheap enough to call from the event loop"""
+        return self.cache.get(ticket_id)
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        ticket = self.cache.get(ticket_id)
+        if ticket is not None:
+            return ticket
+        with self._lock:
+            row = self._conn.execute("SELECT ticket_id, customer_name, issue, priority FROM tickets WHERE ticket_id = ?",
+                                     (ticket_id,)).fetchone()
+        if row is None:
+            return None
+        ticket = Ticket(*row)
+        self.cache.set(ticket_id, ticket)
+        return ticket
+
+
+_ticket_store: Optional[TicketStore] = None
+_db_path = DEFAULT_TICKET_DB
+_cache_settings = {}
+
+
+def configure_ticket_store(path: str, **cache_settings):
+    global _ticket_store, _db_path, _cache_settings
+    _db_path = path
+    _cache_settings = cache_settings
+    _ticket_store = None
+
+
+def get_ticket_store() -> TicketStore:
+    global _ticket_store
+    if _ticket_store is None:
+        _ticket_store = TicketStore(_db_path, **_cache_settings)
+    return _ticket_store
@@ -0,0 +1,131 @@
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Type
+
+from temporalio import activity, workflow
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ExecuteActivityInput,
+    ExecuteWorkflowInput,
+    Interceptor,
+    WorkflowInboundInterceptor,
+    WorkflowInterceptorClassInput,
+)
+
+
+class TraceWriter:
+    """Appends one JSON span per line; processes can share the file, since each span is a single append"""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, span: dict):
+        line = json.dumps(span, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _ticket_fields(args: Sequence) -> dict:
+    # Activities take a Ticket or TicketRef, though not always first (release_agent takes the agent name first)
+    for arg in args:
+        if hasattr(arg, "ticket_id"):
+            return {"ticket_id": arg.ticket_id, "priority": getattr(arg, "priority", None)}
+    return {"ticket_id": None, "priority": None}
+
+
+def _timestamp(moment: datetime) -> float:
+    return round(moment.timestamp(), 6)
+
+
+class TracingInterceptor(Interceptor):
+    """Writes a span for every activity attempt and every workflow run while tracing is configured"""
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityTracing(next)
+
+    def workflow_interceptor_class(self, input: WorkflowInterceptorClassInput) -> Optional[Type[WorkflowInboundInterceptor]]:
+        return _WorkflowTracing
+
+
+class _ActivityTracing(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput):
+        writer = get_trace_writer()
+        if writer is None:
+            return await super().execute_activity(input)
+        info = activity.info()
+        span = {
+            "kind": "activity",
+            **_ticket_fields(input.args),
+            "name": info.activity_type,
+            "task_queue": info.task_queue,
+            "local": info.is_local,
+            "attempt": info.attempt,
+            "workflow_id": info.workflow_id,
+            "scheduled": _timestamp(info.current_attempt_scheduled_time),
+            "started": _timestamp(info.started_time),
+        }
+        status = "ok"
+        try:
+            return await super().execute_activity(input)
+        except BaseException as e:
+            status = getattr(e, "type", None) or type(e).__name__
+            raise
+        finally:
+            span["completed"] = _timestamp(datetime.now(timezone.utc))
+            span["status"] = status
+            writer.write(span)
+
+
+class _WorkflowTracing(WorkflowInboundInterceptor):
+    async def execute_workflow(self, input: ExecuteWorkflowInput):
+        # Exception rather than BaseException: eviction from the worker's cache isn't the end of the run
+        try:
+            result = await super().execute_workflow(input)
+        except Exception as e:
+            self._write_span(input, type(e).__name__)
+            raise
+        self._write_span(input, "ok")
+        return result
+
+    @staticmethod
+    def _write_span(input: ExecuteWorkflowInput, status: str):
+        # A replay re-runs code that already produced its span
+        if workflow.unsafe.is_replaying():
+            return
+        info = workflow.info()
+        span = {
+            "kind": "workflow",
+            **_ticket_fields(input.args),
+            "name": info.workflow_type,
+            "task_queue": info.task_queue,
+            "attempt": info.attempt,
+            "workflow_id": info.workflow_id,
+            "parent_id": info.parent.workflow_id if info.parent else None,
+            "scheduled": _timestamp(info.start_time),
+            "started": _timestamp(info.start_time),
+            "completed": _timestamp(workflow.now()),
+            "status": status,
+        }
+        with workflow.unsafe.sandbox_unrestricted():
+            writer = get_trace_writer()
+            if writer is not None:
+                writer.write(span)
+
+
+_writer: Optional[TraceWriter] = None
+
+
+def configure_tracing(path: Optional[str]):
+    global _writer
+    if _writer is not None:
+        _writer.close()
+    _writer = TraceWriter(path) if path else None
+
+
+def get_trace_writer() -> Optional[TraceWriter]:
+    return _writer
@@ -1,7 +1,13 @@
+import argparse
 import asyncio
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
 from temporalio.client import Client
+from temporalio.runtime import Runtime
 from temporalio.worker import Worker
 
+from base_workflow import local_activities
 from workflow import SupportTicketSystem, LowPriorityWorkflow, MediumPriorityWorkflow, HighPriorityWorkflow
 
 from activities import (
@@ -16,63 +22,191 @@ from activities import (
     search_knowledge_base,
     validate_resolution,
     release_agent,
+    store_ticket,
+    suggest_timeouts,
+)
+
+from codec import add_converter_arguments, data_converter_from_args
+from activity_latency import (
+    DEFAULT_LATENCY_DB, LatencyInterceptor, configure_latency_recorder, get_latency_recorder,
 )
+from metrics import CacheStatsReporter, MetricsInterceptor, metrics_runtime
+from tracing import TracingInterceptor, configure_tracing
+from loop_monitor import Instrumentation, LoopMonitor
+from agent_pool import DEFAULT_ASSIGNMENT_TTL, DEFAULT_DB_PATH, configure_agent_pool, get_agent_pool
+from knowledge_base import DEFAULT_KB_DIR, configure_knowledge_base, get_knowledge_base
+from notifications import configure_notifications
+from profiles import PROFILES, LatencyProfile, load_profile, set_active_profile
+from ticket_store import DEFAULT_TICKET_DB, configure_ticket_store, get_ticket_store
+from worker_config import QUEUE_SETTINGS, TASK_QUEUES, WorkerConfig, default_config, load_worker_config
 
 import logging
 
-async def main():
-    client = await Client.connect("localhost:7233")
-    logging.basicConfig(level=logging.INFO)
+WORKFLOWS = [SupportTicketSystem, LowPriorityWorkflow, MediumPriorityWorkflow, HighPriorityWorkflow]
 
-    # Or more specifically for Temporal
-    logging.getLogger("temporalio.workflow").setLevel(logging.INFO)
+QUEUE_ACTIVITIES = {
+    "support": [
+        search_knowledge_base,
+        send_auto_response,
+        notify_customer,
+        notify_management,
+        agent_resolve,
+        release_agent
+    ],
+    "internal": [
+        assign_agent,
+        agent_investigate,
+        escalate_to_engineering,
+        store_ticket,
+        suggest_timeouts,
+    ],
+    # Activities related to the product itself
+    "engineering": [
+        apply_urgent_fix,
+        validate_resolution,
+    ],
+}
 
-    main_worker = Worker(
-        client,
-        workflows=[SupportTicketSystem, LowPriorityWorkflow, MediumPriorityWorkflow, HighPriorityWorkflow],
-        task_queue="workflows"
-    )
+def build_workers(
+    client: Client,
+    config: Optional[WorkerConfig] = None,
+    task_queues: Iterable[str] = TASK_QUEUES,
+    graceful_shutdown_timeout: timedelta = timedelta(),
+) -> List[Worker]:
+    """One worker per task queue: workflows, plus the support/internal/engineering activity groups"""
+    config = config or default_config()
+    interceptors = [MetricsInterceptor(), TracingInterceptor()]
+    if get_latency_recorder() is not None:
+        # Only when asked for: recording means SQLite writes from every worker process
+        interceptors.insert(0, LatencyInterceptor())
+    workers = []
+    for task_queue in task_queues:
+        if task_queue == "workflows":
+            # Local activities run inside the workflow worker, so it has to register them too
+            registrations = {"workflows": WORKFLOWS, "activities": local_activities()}
+        else:
+            registrations = {"activities": QUEUE_ACTIVITIES[task_queue]}
+        workers.append(Worker(
+            client,
+            task_queue=task_queue,
+            graceful_shutdown_timeout=graceful_shutdown_timeout,
+            interceptors=interceptors,
+            **registrations,
+            **config[task_queue].worker_kwargs()
+        ))
+    return workers
 
-    support_worker = Worker(
-        client,
-        activities=[
-            search_knowledge_base,
-            send_auto_response,
-            notify_customer,
-            notify_management,
-            agent_resolve,
-            release_agent
-        ],
-        task_queue="support"
-    )
+def add_worker_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", default="default",
+                        help=f"Activity latency/failure profile: one of {', '.join(PROFILES)} or a JSON profile file")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the profile's random number generator")
+    parser.add_argument("--kb-dir", default=DEFAULT_KB_DIR, help="Directory of knowledge base articles to index")
+    parser.add_argument("--kb-cache-size", type=int, default=10_000, help="Knowledge base results kept in the cache")
+    parser.add_argument("--kb-cache-ttl", type=float, default=300, help="Seconds a knowledge base hit stays cached")
+    parser.add_argument("--kb-negative-ttl", type=float, default=30,
+                        help="Seconds a knowledge base miss (no solution found) stays cached")
+    parser.add_argument("--agent-db", default=DEFAULT_DB_PATH,
+                        help="SQLite file holding the agent pool, shared by every worker process on the host")
+    parser.add_argument("--agent-assignment-ttl", type=float, default=DEFAULT_ASSIGNMENT_TTL, metavar="SECONDS",
+                        help="Reclaim agents held longer than this, e.g. by workflows that were terminated")
+    parser.add_argument("--ticket-db", default=DEFAULT_TICKET_DB,
+                        help="SQLite file holding full tickets; workflows pass activities only the ticket ID")
+    parser.add_argument("--ticket-cache-size", type=int, default=10_000, help="Tickets kept in each process's read cache")
+    parser.add_argument("--latency-db", nargs="?", const=DEFAULT_LATENCY_DB, metavar="PATH",
+                        help="Record activity latencies for run_temporal.py --adaptive-timeouts in this SQLite file, "
+                             "shared by the host's worker processes (default: off; no PATH: activity_latency.db)")
+    parser.add_argument("--notify-window", type=float, default=0.5,
+                        help="Seconds to collect notifications for a recipient before sending them as one digest")
+    parser.add_argument("--notify-max-batch", type=int, default=50,
+                        help="Send a recipient's digest early once this many notifications are waiting")
+    parser.add_argument("--worker-config", metavar="PATH",
+                        help="JSON file of per-task-queue worker settings, e.g. {\"support\": {\"max_concurrent_activities\": 200}}")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="QUEUE.SETTING=VALUE",
+                        help=f"Override one worker setting (repeatable). Settings: {', '.join(QUEUE_SETTINGS)}")
+    parser.add_argument("--metrics-address", metavar="HOST:PORT",
+                        help="Serve SDK and ticket metrics in Prometheus format here, e.g. 127.0.0.1:9464 (default: off)")
+    parser.add_argument("--trace-file", metavar="PATH",
+                        help="Append a JSON span per activity attempt and workflow run here (see critical_path.py)")
+    parser.add_argument("--loop-lag-threshold", type=float, default=0.25, metavar="SECONDS",
+                        help="Log the blocking stack when the event loop is stuck this long")
+    parser.add_argument("--debug-address", metavar="HOST:PORT",
+                        help="Serve /lag, /stack, and /profile?seconds=N here, e.g. 127.0.0.1:9470 (default: off)")
+    parser.add_argument("--profile-dir", default=".",
+                        help="Where SIGUSR1 profiles are written (first SIGUSR1 starts sampling, the next writes it)")
+    parser.add_argument("--cache-stats-interval", type=float, default=60, metavar="SECONDS",
+                        help="Log and publish knowledge base and ticket cache hit/miss/eviction counts this often "
+                             "(0: off)")
+    add_converter_arguments(parser)
 
-    internal_worker = Worker(
-        client,
-        activities=[
-            assign_agent,
-            agent_investigate,
-            escalate_to_engineering,
-        ],
-        task_queue="internal"
-    )
+def configure_process(args: argparse.Namespace, seed_offset: int = 0) -> LatencyProfile:
+    """Per-process setup shared by worker.py and launcher.py: activity profile, caches, stores, and instrumentation"""
+    seed = args.seed + seed_offset if args.seed is not None else None
+    profile = load_profile(args.profile, seed)
+    set_active_profile(profile)
 
-    # Activities related to the product itself
-    engineering_worker = Worker(
-        client,
-        activities=[
-            apply_urgent_fix,
-            validate_resolution,
-        ],
-        task_queue="engineering"
+    # Build the index up front so the first search doesn't pay for it
+    configure_knowledge_base(args.kb_dir, maxsize=args.kb_cache_size, ttl=args.kb_cache_ttl,
+                             negative_ttl=args.kb_negative_ttl)
+    logging.info(f"Indexed {len(get_knowledge_base())} knowledge base articles from {args.kb_dir}")
+
+    configure_notifications(window=args.notify_window, max_batch=args.notify_max_batch)
+
+    configure_ticket_store(args.ticket_db, cache_size=args.ticket_cache_size)
+
+    configure_latency_recorder(args.latency_db)
+    configure_tracing(args.trace_file)
+
+    configure_agent_pool(args.agent_db, assignment_ttl=args.agent_assignment_ttl)
+    # Agents left behind by terminated workflows come back at startup, not only once the pool runs dry
+    get_agent_pool().reap()
+    logging.info(f"Agent pool {args.agent_db}: {get_agent_pool().utilization()} (active, capacity) by kind")
+    return profile
+
+def start_instrumentation(args: argparse.Namespace, runtime: Runtime, port_offset: int = 0) -> Instrumentation:
+    """Loop lag monitor, cache stats, and on-demand profiler for this process; call from inside the running event loop"""
+    activity_names = {fn.__name__ for fns in QUEUE_ACTIVITIES.values() for fn in fns}
+    monitor = LoopMonitor(threshold=args.loop_lag_threshold, meter=runtime.metric_meter, activity_names=activity_names)
+    debug_address = None
+    if args.debug_address:
+        # Like metrics, each worker process on the host gets its own port
+        host, _, port = args.debug_address.rpartition(":")
+        debug_address = f"{host}:{int(port) + port_offset}"
+    caches = CacheStatsReporter({"knowledge_base": get_knowledge_base().cache, "ticket_store": get_ticket_store().cache},
+                                meter=runtime.metric_meter, interval=args.cache_stats_interval)
+    instrumentation = Instrumentation(monitor, args.profile_dir, reporters=[caches])
+    instrumentation.start(debug_address)
+    return instrumentation
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Temporal support ticket workers")
+    add_worker_arguments(parser)
+    return parser.parse_args()
+
+async def main():
+    args = parse_args()
+    runtime = metrics_runtime(args.metrics_address)
+    client = await Client.connect(
+        "localhost:7233",
+        data_converter=data_converter_from_args(args),
+        runtime=runtime,
     )
+    logging.basicConfig(level=logging.INFO)
+
+    profile = configure_process(args)
+    logging.info(f"Using activity profile '{profile.name}' (seed: {profile.seed})")
+
+    # Or more specifically for Temporal
+    logging.getLogger("temporalio.workflow").setLevel(logging.INFO)
+
+    config = load_worker_config(args.worker_config, args.overrides)
+    for queue, queue_config in config.items():
+        if queue_config.worker_kwargs():
+            logging.info(f"Task queue '{queue}' settings: {queue_config.worker_kwargs()}")
+    workers = build_workers(client, config)
+    start_instrumentation(args, runtime)
 
     print("Workers ready...")
-    await asyncio.gather(
-        main_worker.run(),
-        support_worker.run(),
-        internal_worker.run(),
-        engineering_worker.run()
-    )
+    await asyncio.gather(*(w.run() for w in workers))
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,59 @@
+import json
+from dataclasses import dataclass, fields, asdict
+from typing import Dict, Iterable, Optional
+
+TASK_QUEUES = ("workflows", "support", "internal", "engineering")
+
+
+@dataclass
+class QueueConfig:
+    """Worker sizing for one task queue. Anything left as None keeps the SDK default."""
+    max_concurrent_activities: Optional[int] = None
+    max_concurrent_workflow_tasks: Optional[int] = None
+    max_concurrent_local_activities: Optional[int] = None
+    max_concurrent_activity_task_polls: Optional[int] = None
+    max_concurrent_workflow_task_polls: Optional[int] = None
+    max_activities_per_second: Optional[float] = None             # this worker only
+    max_task_queue_activities_per_second: Optional[float] = None  # enforced by the server across all workers
+
+    def worker_kwargs(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+QUEUE_SETTINGS = {f.name: f.type for f in fields(QueueConfig)}
+
+WorkerConfig = Dict[str, QueueConfig]
+
+
+def default_config() -> WorkerConfig:
+    return {queue: QueueConfig() for queue in TASK_QUEUES}
+
+
+def _set(config: WorkerConfig, queue: str, setting: str, value):
+    if queue not in config:
+        raise ValueError(f"Unknown task queue: {queue} (expected one of {', '.join(TASK_QUEUES)})")
+    if setting not in QUEUE_SETTINGS:
+        raise ValueError(f"Unknown worker setting: {setting} (expected one of {', '.join(QUEUE_SETTINGS)})")
+    if value is not None:
+        value = float(value) if "per_second" in setting else int(value)
+    setattr(config[queue], setting, value)
+
+
+def load_worker_config(path: Optional[str] = None, overrides: Iterable[str] = ()) -> WorkerConfig:
+    """Build per-queue worker settings from a JSON file plus `queue.setting=value` overrides.
+
+    The file maps task queue to settings, e.g. {"support": {"max_concurrent_activities": 200}}.
+    """
+    config = default_config()
+    if path:
+        with open(path) as f:
+            for queue, settings in json.load(f).items():
+                for setting, value in settings.items():
+                    _set(config, queue, setting, value)
+    for override in overrides:
+        key, sep, value = override.partition("=")
+        queue, dot, setting = key.partition(".")
+        if not sep or not dot:
+            raise ValueError(f"Expected queue.setting=value, got: {override}")
+        _set(config, queue.strip(), setting.strip(), value.strip())
+    return config
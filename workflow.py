@@ -1,47 +1,114 @@
-from typing import Optional, List
+import asyncio
+from typing import Dict, Optional, List
 
 from temporalio import workflow
 from temporalio.exceptions import ActivityError, ApplicationError
 
-from base_workflow import WorkflowBase
+from base_workflow import TicketHandler, WorkflowBase
 from enums import InvestigationResult, FixResult, EscalationResult
-from models import Ticket
+from models import Ticket, TicketRef, TimelineEvent, TimelinePage, WorkflowOptions
+
+# Events kept in full; older ones are folded into per-event counts so long-lived tickets don't grow without bound
+TIMELINE_CAP = 500
+TIMELINE_PAGE_SIZE = 100
+
 
 @workflow.defn
 class SupportTicketSystem(WorkflowBase):
     def __init__(self):
         self._status = "new"
         self._assigned_agent: Optional[str] = None
-        self._timeline: List[dict] = []
-        self._escalation_count = 0
+        self._timeline: List[TimelineEvent] = []
+        self._timeline_seq = 0
+        self._timeline_summary: Dict[str, int] = {}
         self._resolution_attempts = 0
+        self._handler: Optional[TicketHandler] = None
 
     @workflow.query
     def status(self) -> str:
+        # Inline dispatch: the handler's steps are the progress, but the parent has the final word
+        if self._handler is not None and self._status not in ("completed", "failed"):
+            return self._handler._status
         return self._status
 
     @workflow.query
     def assigned_agent(self) -> Optional[str]:
+        if self._handler is not None:
+            return self._handler._assigned_agent
         return self._assigned_agent
 
     @workflow.query
     def timeline(self) -> List[dict]:
-        return self._timeline
+        """Every retained event, as dicts; pollers should use timeline_since"""
+        return [event._asdict() for event in self._timeline]
+
+    @workflow.query
+    def timeline_since(self, cursor: int = 0, limit: int = TIMELINE_PAGE_SIZE) -> TimelinePage:
+        """Up to `limit` events with a sequence number after `cursor` (0 for the start)"""
+        missed, trimmed_by_event = 0, {}
+        first_seq = self._timeline[0].seq if self._timeline else self._timeline_seq + 1
+        if cursor < first_seq - 1:
+            # The caller is behind the retained window; the events it missed are only counts now
+            missed, trimmed_by_event = first_seq - 1 - cursor, self._timeline_summary
+        # Sequence numbers are contiguous, so the start is found by arithmetic rather than a scan
+        start = max(0, cursor - first_seq + 1)
+        events = self._timeline[start:start + limit]
+        return TimelinePage(
+            events=events,
+            cursor=events[-1].seq if events else max(cursor, first_seq - 1),
+            has_more=start + limit < len(self._timeline),
+            missed=missed,
+            trimmed_by_event=trimmed_by_event,
+        )
 
     @workflow.query
     def escalation_count(self) -> int:
-        return self._escalation_count
+        return self._escalation_count + getattr(self._handler, "_escalation_count", 0)
+
+    @workflow.query
+    def hedge_outcome(self) -> str:
+        """Only meaningful for inline low priority runs; with child dispatch, query the low-<ticket_id> workflow"""
+        return getattr(self._handler, "_hedge_outcome", "off")
+
+    @workflow.query
+    def was_escalated(self) -> bool:
+        """Inline medium priority runs; with child dispatch, query the medium-<ticket_id> workflow"""
+        return getattr(self._handler, "_escalated_to_engineering", False)
+
+    @workflow.query
+    def fix_attempted(self) -> bool:
+        """Inline high priority runs; with child dispatch, query the high-<ticket_id> workflow"""
+        return getattr(self._handler, "_fix_attempted", False)
+
+    async def _dispatch(self, handler_class, ticket: Ticket) -> str:
+        # From here on only the ID and priority travel; activities read the rest from the ticket store
+        ref, _ = await self.do_parallel(self.do_store_ticket(ticket), self._load_adaptive_timeouts())
+        if self._options.dispatch == "inline":
+            # Same code as the child workflow, but its events land in this workflow's history
+            self._handler = handler_class()
+            self._handler._options = self._options
+            return await self._handler.handle(ref)
+        return await workflow.execute_child_workflow(
+            handler_class.run,
+            args=[ref, self._options],
+            task_queue="workflows",
+            id=f"{ticket.priority}-{ticket.ticket_id}",
+        )
 
     def _add_timeline_event(self, event: str, details: str = ""):
-        self._timeline.append({
-            "timestamp": workflow.now().isoformat(),
-            "event": event,
-            "details": details,
-            "status": self._status
-        })
+        self._timeline_seq += 1
+        self._timeline.append(TimelineEvent(self._timeline_seq, workflow.now().isoformat(), event, details, self._status))
+        if len(self._timeline) > TIMELINE_CAP:
+            # Trim in chunks so the list isn't shifted on every event once it's full
+            dropped = self._timeline[:TIMELINE_CAP // 10]
+            del self._timeline[:TIMELINE_CAP // 10]
+            for old in dropped:
+                self._timeline_summary[old.event] = self._timeline_summary.get(old.event, 0) + 1
 
     @workflow.run
-    async def run(self, ticket: Ticket) -> str:
+    async def run(self, ticket: Ticket, options: Optional[WorkflowOptions] = None) -> str:
+        self._options = options or WorkflowOptions()
+        self._upsert_ticket_state(priority=ticket.priority)
         self._status = "triaging"
         self._add_timeline_event("workflow_started", f"Priority: {ticket.priority}")
 
@@ -50,12 +117,7 @@ class SupportTicketSystem(WorkflowBase):
                 workflow.logger.info("🔵 LOW priority ticket {ticket.ticket_id}: {ticket.issue}\n"
                              f"Priority: {ticket.priority.upper()} | Customer: {ticket.customer_name}\n")
 
-                result = await workflow.execute_child_workflow(
-                    LowPriorityWorkflow.run,
-                    ticket,
-                    task_queue="workflows",
-                    id=f"low-{ticket.ticket_id}",
-                )
+                result = await self._dispatch(LowPriorityWorkflow, ticket)
                 self._status = "completed"
                 self._add_timeline_event("workflow_completed", result)
                 return result
@@ -64,12 +126,7 @@ class SupportTicketSystem(WorkflowBase):
                 self._status = "processing_medium_priority"
                 workflow.logger.info("🟡 MEDIUM priority {ticket.ticket_id}: {ticket.issue}\n"
                              f"Priority: {ticket.priority.upper()} | Customer: {ticket.customer_name}\n")
-                result = await workflow.execute_child_workflow(
-                    MediumPriorityWorkflow.run,
-                    ticket,
-                    task_queue="workflows",
-                    id=f"medium-{ticket.ticket_id}",
-                )
+                result = await self._dispatch(MediumPriorityWorkflow, ticket)
                 self._status = "completed"
                 self._add_timeline_event("workflow_completed", result)
                 return result
@@ -79,12 +136,7 @@ class SupportTicketSystem(WorkflowBase):
                 # steps.append("Routed to high priority workflow")
                 workflow.logger.info("🔴 HIGH priority {ticket.ticket_id}: {ticket.issue}\n"
                              f"Priority: {ticket.priority.upper()} | Customer: {ticket.customer_name}\n")
-                result = await workflow.execute_child_workflow(
-                    HighPriorityWorkflow.run,
-                    ticket,
-                    task_queue="workflows",
-                    id=f"high-{ticket.ticket_id}",
-                )
+                result = await self._dispatch(HighPriorityWorkflow, ticket)
                 self._status = "completed"
                 self._add_timeline_event("workflow_completed", result)
                 return result
@@ -109,13 +161,16 @@ class SupportTicketSystem(WorkflowBase):
             return f"Failed: {ticket.ticket_id} - {str(e)}"
 
 @workflow.defn
-class LowPriorityWorkflow(WorkflowBase):
+class LowPriorityWorkflow(TicketHandler):
     def __init__(self):
         self._status = "new"
         self._kb_search_attempted = False
         self._agent_assigned = False
+        self._assigned_agent: Optional[str] = None
         self._resolution_method = None
         self._customer_notified = False
+        self._hedge = None
+        self._hedge_outcome = "off"
 
     @workflow.query
     def status(self) -> str:
@@ -125,58 +180,142 @@ class LowPriorityWorkflow(WorkflowBase):
     def resolution_method(self) -> Optional[str]:
         return self._resolution_method
 
+    @workflow.query
+    def hedge_outcome(self) -> str:
+        """off, waiting, started, cancelled (KB hit first), wasted (KB hit after an agent was requested),
+        paid_off (KB missed while the agent was already on its way), or not_started (KB missed before the delay)"""
+        return self._hedge_outcome
+
+    async def _hedged_assign(self, ticket: TicketRef) -> str:
+        await asyncio.sleep(self._options.hedge_agent_after)
+        self._hedge_outcome = "started"
+        return await self.do_assign_agent(ticket)
+
+    async def _assign_after_kb_miss(self, ticket: TicketRef) -> str:
+        hedge, self._hedge = self._hedge, None
+        if hedge is None:
+            return await self.do_assign_agent(ticket)
+        if self._hedge_outcome == "waiting":
+            # The KB missed (or timed out) before the delay ran out -- skip the rest of the wait and assign now
+            hedge.cancel()
+            self._hedge_outcome = "not_started"
+            return await self.do_assign_agent(ticket)
+        self._hedge_outcome = "paid_off"
+        return await hedge
+
+    async def _abandon_hedge(self, ticket: TicketRef):
+        """Call off the speculative assignment and hand back any agent it reserved; a no-op once the hedge is used"""
+        hedge, self._hedge = self._hedge, None
+        if hedge is None:
+            return
+        if self._hedge_outcome == "waiting":
+            hedge.cancel()
+            self._hedge_outcome = "cancelled"
+            return
+        self._hedge_outcome = "wasted"
+        # assign_agent doesn't heartbeat, so a cancel wouldn't reach it -- let it finish, then release
+        try:
+            agent = await hedge
+        except ActivityError:
+            return
+        await self.do_release_agent(agent, ticket)
+
     @workflow.run
-    async def run(self, ticket: Ticket):
-        self._status = "sending_auto_response"
+    async def run(self, ticket: TicketRef, options: Optional[WorkflowOptions] = None):
+        self._options = options or WorkflowOptions()
+        self._upsert_ticket_state(priority=ticket.priority)
+        return await self.handle(ticket)
+
+    async def handle(self, ticket: TicketRef):
+        # The auto-response goes out alongside the search, and the search is what the ticket waits on
+        self._status = "searching_knowledge_base"
         workflow.logger.debug(f"{ticket.ticket_id} Starting low-priority workflow...")
-        await self.do_send_auto_response(ticket)
-
+        if self._options.hedge_agent_after is not None:
+            self._hedge_outcome = "waiting"
+            self._hedge = asyncio.ensure_future(self._hedged_assign(ticket))
+        abandoning = None
         try:
-            self._status = "searching_knowledge_base"
+            # The acknowledgment doesn't need to land before we start searching
             self._kb_search_attempted = True
-            solution = await self.do_search_knowledge_base(ticket)
-
-            self._status = "notifying_customer"
-            await self.do_notify_customer(ticket, solution)
-            self._customer_notified = True
+            auto_result, kb_result = await self.do_parallel(
+                self.do_send_auto_response(ticket),
+                self.do_search_knowledge_base(ticket),
+                return_exceptions=True,
+            )
+            if isinstance(auto_result, BaseException):
+                raise auto_result
 
             try:
-                await self.do_validate_resolution(ticket)
+                if isinstance(kb_result, BaseException):
+                    raise kb_result
+                solution = kb_result
 
-                self._status = "resolved"
-                self._resolution_method = "automated"
-                workflow.logger.info(f"\n✅ SUCCESS: Ticket {ticket.ticket_id} resolved automatically!\n")
-                return f"Resolved automatically: {ticket.ticket_id}"
+                self._status = "notifying_customer"
+                # A hedge already under way has to finish assigning before its agent can go back; the customer
+                # shouldn't wait on that, so it runs alongside the rest of the ticket
+                abandoning = asyncio.ensure_future(self._abandon_hedge(ticket))
+                await self.do_notify_customer(ticket, solution)
+                self._customer_notified = True
+
+                try:
+                    await self.do_validate_resolution(ticket)
 
-            except (ActivityError, ApplicationError)    :
-                workflow.logger.warn(f"Resolution validation failed - compensating notification for {ticket.ticket_id}")
-                await self.do_notify_customer(ticket,"We apologize - our initial solution may not have worked. An agent will review your case.")
-                self._customer_notified = False
+                    self._status = "resolved"
+                    self._resolution_method = "automated"
+                    workflow.logger.info(f"\n✅ SUCCESS: Ticket {ticket.ticket_id} resolved automatically!\n")
+                    return f"Resolved automatically: {ticket.ticket_id}"
 
-        except ActivityError:
-            # KB Search failed -- need human help
-            self._status = "assigning_to_agent"
-            self._agent_assigned = True
-            workflow.logger.debug(f"{ticket.ticket_id} No solution found in knowledge base, assigning to agent...")
+                except (ActivityError, ApplicationError)    :
+                    workflow.logger.warn(f"Resolution validation failed - compensating notification for {ticket.ticket_id}")
+                    await self.do_notify_customer(ticket,"We apologize - our initial solution may not have worked. An agent will review your case.")
+                    self._customer_notified = False
 
-            self._status = "agent_resolving"
-            await self.do_assign_agent(ticket)
-            await self.do_agent_resolve(ticket)
+            except ActivityError:
+                # KB Search failed -- need human help
+                self._status = "assigning_to_agent"
+                self._agent_assigned = True
+                workflow.logger.debug(f"{ticket.ticket_id} No solution found in knowledge base, assigning to agent...")
 
-            self._resolution_method = "agent"
-            if not self._customer_notified:
-                await self.do_notify_customer(ticket, "Your ticket has been resolved by our team!")
+                try:
+                    agent = await self._assign_after_kb_miss(ticket)
+                    self._assigned_agent = agent
+                    self._upsert_ticket_state(agent=agent)
+                except ActivityError as e:
+                    if not self._agent_unavailable(e):
+                        raise
+                    self._status = InvestigationResult.AGENT_UNAVAILABLE.value
+                    workflow.logger.warn(f"{ticket.ticket_id} No agents available")
+                    await self.do_notify_customer(ticket, "All of our agents are busy -- we'll follow up as soon as one is free.")
+                    return f"No agents available: {ticket.ticket_id}"
+
+                self._status = "agent_resolving"
+                self._held_agent = agent
+                try:
+                    await self.do_agent_resolve(ticket)
 
-            self._status = "resolved"
-            workflow.logger.info(f"\n✅ SUCCESS: Ticket {ticket.ticket_id} resolved by agent!\n")
-            return f"Resolved by agent: {ticket.ticket_id}"
+                    self._resolution_method = "agent"
+                    steps = [self._release_held_agent(ticket)]
+                    if not self._customer_notified:
+                        steps.append(self.do_notify_customer(ticket, "Your ticket has been resolved by our team!"))
+                    await self.do_parallel(*steps)
+                finally:
+                    # A failed resolve or notification mustn't leave the agent reserved in the pool
+                    await self._release_held_agent(ticket)
+
+                self._status = "resolved"
+                workflow.logger.info(f"\n✅ SUCCESS: Ticket {ticket.ticket_id} resolved by agent!\n")
+                return f"Resolved by agent: {ticket.ticket_id}"
+        finally:
+            # Any exit the hedge didn't take part in (a failed auto-response, an unexpected error) still calls it off
+            await self._abandon_hedge(ticket)
+            if abandoning is not None:
+                await abandoning
 
 @workflow.defn
-class MediumPriorityWorkflow(WorkflowBase):
+class MediumPriorityWorkflow(TicketHandler):
     def __init__(self):
         self._status = "new"
         self._assigned_agent = None
-        self._agent_reserved = False
         self._investigation_result = None
         self._escalated_to_engineering = False
         self._engineering_response = None
@@ -194,11 +333,17 @@ class MediumPriorityWorkflow(WorkflowBase):
         return self._escalated_to_engineering
 
     @workflow.run
-    async def run(self, ticket: Ticket):
+    async def run(self, ticket: TicketRef, options: Optional[WorkflowOptions] = None):
+        self._options = options or WorkflowOptions()
+        self._upsert_ticket_state(priority=ticket.priority)
+        return await self.handle(ticket)
+
+    async def handle(self, ticket: TicketRef):
         self._status = "assigning_agent"
         try:
             self._assigned_agent = await self.do_assign_agent(ticket)
-            self._agent_reserved = True
+            self._held_agent = self._assigned_agent
+            self._upsert_ticket_state(agent=self._assigned_agent)
             workflow.logger.debug(f"Reserved agent {self._assigned_agent} for ticket {ticket.ticket_id}")
 
             self._status = "investigating"
@@ -207,22 +352,27 @@ class MediumPriorityWorkflow(WorkflowBase):
 
             if assignment_result == InvestigationResult.COMPLETE.value:
                 self._status = "notifying_customer"
-                await self.do_notify_customer(ticket, f"Your issue has been resolved by {self._assigned_agent}!")
+                await self.do_parallel(
+                    self.do_notify_customer(ticket, f"Your issue has been resolved by {self._assigned_agent}!"),
+                    self._release_held_agent(ticket),
+                )
 
                 self._status = "resolved"
                 workflow.logger.info(f"\n✅ SUCCESS: Ticket {ticket.ticket_id} resolved after investigation!\n")
                 return f"Resolved with investigation: {ticket.ticket_id}"
 
-            if self._agent_reserved:
-                workflow.logger.info(f"Investigation failed - releasing reserved agent {self._assigned_agent}")
-                await self.do_release_agent(self._assigned_agent, ticket)
-                self._agent_reserved = False
-
             self._status = "escalating_to_engineering"
             self._escalated_to_engineering = True
+            self._record_escalation()
             workflow.logger.debug(f"{ticket.ticket_id} Investigation failed, escalate to engineering")
 
-            esc_result = await self.do_escalate_to_engineering(ticket)
+            # Releasing the agent is compensation for the failed investigation; engineering doesn't need to wait on it.
+            # The held agent is cleared as soon as its release succeeds, even if the escalation beside it fails.
+            workflow.logger.info(f"Investigation failed - releasing reserved agent {self._assigned_agent}")
+            _, esc_result = await self.do_parallel(
+                self._release_held_agent(ticket),
+                self.do_escalate_to_engineering(ticket),
+            )
             self._engineering_response = esc_result
 
             if esc_result == EscalationResult.REJECTED.value:
@@ -232,26 +382,31 @@ class MediumPriorityWorkflow(WorkflowBase):
                 try:
                     new_agent = await self.do_assign_agent(ticket)
                     self._assigned_agent = new_agent
-                    self._agent_reserved = True
+                    self._held_agent = new_agent
+                    self._upsert_ticket_state(agent=new_agent)
 
                     self._status = "agent_final_attempt"
                     await self.do_agent_resolve(ticket)
-                    await self.do_notify_customer(ticket, "Resolved by agent after engineering review!")
+                    await self.do_parallel(
+                        self.do_notify_customer(ticket, "Resolved by agent after engineering review!"),
+                        self._release_held_agent(ticket),
+                    )
 
                     self._status = "resolved"
                     return f"Resolved by agent after engineering review: {ticket.ticket_id}"
 
                 except ActivityError:
-                    if self._agent_reserved:
-                        workflow.logger.warn(f"Final agent attempt failed - releasing agent {self._assigned_agent}")
-                        await self.do_release_agent(self._assigned_agent, ticket)
-                        self._agent_reserved = False
+                    if self._held_agent:
+                        workflow.logger.warn(f"Final agent attempt failed - releasing agent {self._held_agent}")
+                        await self._release_held_agent(ticket)
 
                     self._status = "failed"
                     workflow.logger.debug(f"{ticket.ticket_id} Agent could not resolve--notifying management")
-                    await self.do_notify_customer(ticket,
-              "This issue required engineering review, but no agent could resolve")
-                    await self.do_notify_management(ticket)
+                    await self.do_parallel(
+                        self.do_notify_customer(ticket,
+                                                "This issue required engineering review, but no agent could resolve"),
+                        self.do_notify_management(ticket),
+                    )
                     return f"Agent unable to resolve, management notified: {ticket.ticket_id}"
 
             else:
@@ -264,15 +419,20 @@ class MediumPriorityWorkflow(WorkflowBase):
                 return f"Resolved by engineering: {ticket.ticket_id}"
 
         except Exception as e:
-            # Any unexpected failure - compensate agent reservation
-            if self._agent_reserved:
-                workflow.logger.warn(f"Unexpected workflow failure - releasing agent {self._assigned_agent}")
-                await self.do_release_agent(self._assigned_agent, ticket)
-                self._agent_reserved = False
+            if self._agent_unavailable(e) and self._held_agent is None:
+                self._status = InvestigationResult.AGENT_UNAVAILABLE.value
+                workflow.logger.warn(f"{ticket.ticket_id} No agents available")
+                await self.do_notify_customer(ticket, "All of our agents are busy -- we'll follow up as soon as one is free.")
+                return f"No agents available: {ticket.ticket_id}"
+
+            # Any unexpected failure - compensate agent reservation, unless its release already went through
+            if self._held_agent:
+                workflow.logger.warn(f"Unexpected workflow failure - releasing agent {self._held_agent}")
+                await self._release_held_agent(ticket)
             raise
 
 @workflow.defn
-class HighPriorityWorkflow(WorkflowBase):
+class HighPriorityWorkflow(TicketHandler):
     def __init__(self):
         self._status = "new"
         self._assigned_agent = None
@@ -292,36 +452,70 @@ class HighPriorityWorkflow(WorkflowBase):
     def fix_attempted(self) -> bool:
         return self._fix_attempted
 
+    async def _assign_if_available(self, ticket: TicketRef) -> Optional[str]:
+        try:
+            return await self.do_assign_agent(ticket)
+        except ActivityError as e:
+            if not self._agent_unavailable(e):
+                raise
+            workflow.logger.warn(f"{ticket.ticket_id} No senior agents available - continuing without one")
+            return None
+
+    async def _release_if_assigned(self, agent: Optional[str], ticket: TicketRef):
+        if agent:
+            await self.do_release_agent(agent, ticket)
+
     @workflow.run
-    async def run(self, ticket: Ticket):
+    async def run(self, ticket: TicketRef, options: Optional[WorkflowOptions] = None):
+        self._options = options or WorkflowOptions()
+        self._upsert_ticket_state(priority=ticket.priority)
+        return await self.handle(ticket)
+
+    async def handle(self, ticket: TicketRef):
         self._status = "assigning_agent"
         workflow.logger.debug(f"{ticket.ticket_id} Starting high-priority workflow...")
 
-        self._assigned_agent = await self.do_assign_agent(ticket)
-
+        # Engineering starts on an urgent ticket while the senior agent is being assigned
         self._status = "escalating_to_engineering"
-        esc_result = await self.do_escalate_to_engineering(ticket)
+        self._assigned_agent, esc_result = await self.do_parallel(
+            self._assign_if_available(ticket),
+            self.do_escalate_to_engineering(ticket),
+            compensations=[lambda agent: self._release_if_assigned(agent, ticket), None],
+        )
         self._escalation_result = esc_result
+        self._held_agent = self._assigned_agent
+        self._record_escalation()
+        self._upsert_ticket_state(agent=self._assigned_agent)
         workflow.logger.debug(f"{ticket.ticket_id}: {esc_result}")
 
-        self._status = "applying_urgent_fix"
-        self._fix_attempted = True
-        fix_result = await self.do_apply_urgent_fix(ticket)
-        self._fix_result = fix_result
-        workflow.logger.debug(f"{ticket.ticket_id} Urgent Fix result: {fix_result}")
+        try:
+            self._status = "applying_urgent_fix"
+            self._fix_attempted = True
+            fix_result = await self.do_apply_urgent_fix(ticket)
+            self._fix_result = fix_result
+            workflow.logger.debug(f"{ticket.ticket_id} Urgent Fix result: {fix_result}")
 
-        if fix_result == FixResult.FAILED.value:
-            self._status = "failed"
-            workflow.logger.error(f"❌ FAILURE: Could not resolve with urgent fix. Adding ticket to backlog")
-            await self.do_notify_customer(ticket, "Engineering unable to resolve -- we will follow up soon!")
-            await self.do_notify_management(ticket)
-            return f"Failed to resolve urgent issue: {ticket.ticket_id}"  # Fixed: missing return
-
-        else:
-            self._status = "notifying_stakeholders"
-            await self.do_notify_customer(ticket, "Engineering fixed it!")
-            await self.do_notify_management(ticket)
-
-            self._status = "resolved"
-            workflow.logger.info(f"\n✅ SUCCESS: HIGH priority ticket {ticket.ticket_id} resolved!\n")
-            return f"Resolved urgently: {ticket.ticket_id}"
+            if fix_result == FixResult.FAILED.value:
+                self._status = "failed"
+                workflow.logger.error(f"❌ FAILURE: Could not resolve with urgent fix. Adding ticket to backlog")
+                await self.do_parallel(
+                    self.do_notify_customer(ticket, "Engineering unable to resolve -- we will follow up soon!"),
+                    self.do_notify_management(ticket),
+                    self._release_held_agent(ticket),
+                )
+                return f"Failed to resolve urgent issue: {ticket.ticket_id}"  # Fixed: missing return
+
+            else:
+                self._status = "notifying_stakeholders"
+                await self.do_parallel(
+                    self.do_notify_customer(ticket, "Engineering fixed it!"),
+                    self.do_notify_management(ticket),
+                    self._release_held_agent(ticket),
+                )
+
+                self._status = "resolved"
+                workflow.logger.info(f"\n✅ SUCCESS: HIGH priority ticket {ticket.ticket_id} resolved!\n")
+                return f"Resolved urgently: {ticket.ticket_id}"
+        finally:
+            # Only 10 senior slots: a fix or notification that raises still has to hand the agent back
+            await self._release_held_agent(ticket)